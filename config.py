@@ -34,6 +34,7 @@ LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 # File size limits
 MAX_FILE_SIZE_MB = int(os.getenv("MAX_FILE_SIZE_MB", "10"))  # 10MB
 MAX_REPO_SIZE_MB = int(os.getenv("MAX_REPO_SIZE_MB", "100"))  # 100MB
+UPLOAD_BUFFER_SIZE = int(os.getenv("UPLOAD_BUFFER_SIZE", str(1024 * 1024)))  # 1MB chunks when saving uploaded archives
 
 # Analysis settings
 DEFAULT_CHUNK_SIZE = 1000  # Default chunk size for code analysis
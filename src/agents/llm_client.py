@@ -8,6 +8,7 @@ import json
 import logging
 import asyncio
 import httpx
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional, Union, Literal
 
 from config import LLM_API_KEY, LLM_API_URL, LLM_MODEL, MAX_TOKENS
@@ -88,6 +89,35 @@ class LLMClient:
             self.logger.error(f"Error generating text asynchronously: {str(e)}")
             return f"Error generating text: {str(e)}"
     
+    def generate_texts(self, prompts: List[str], max_tokens: int = 1000, temperature: float = 0.3) -> List[str]:
+        """
+        Generate text for several prompts with all requests in flight at once.
+        
+        Args:
+            prompts: Prompts to generate text from
+            max_tokens: Maximum number of tokens to generate per prompt
+            temperature: Temperature for generation
+            
+        Returns:
+            list: Generated texts, in the same order as the prompts
+        """
+        if not prompts:
+            return []
+        
+        async def generate_all() -> List[str]:
+            return await asyncio.gather(*[
+                self.generate_text_async(prompt, max_tokens, temperature) for prompt in prompts
+            ])
+        
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return list(asyncio.run(generate_all()))
+        
+        # Already inside an event loop, so run the batch on its own loop in a worker thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return list(executor.submit(asyncio.run, generate_all()).result())
+    
     def _call_openai_direct(self, prompt: str, max_tokens: int = 1000, temperature: float = 0.3) -> str:
         """
         Call OpenAI API directly using httpx instead of the OpenAI client.
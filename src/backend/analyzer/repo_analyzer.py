@@ -6,15 +6,25 @@ Analyzes repository code and extracts metadata.
 import logging
 import asyncio
 import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional
 from bson import ObjectId
-from src.backend.database.db_client import DBClient
+from src.backend.database.db_client import DBClient, WriteBatch
 from src.backend.code_analyzer.parser import CodeParser
 from src.backend.code_analyzer.language_detector import LanguageDetector
 from src.backend.code_analyzer.function_extractor import FunctionExtractor
 from src.backend.code_analyzer.summarizer import CodeSummarizer
 from src.agents.llm_client import LLMClient
 from src.backend.models.repository import Repository
+from src.backend.llm.query_cache import query_response_cache
+
+
+# Directories never worth descending into
+SKIPPED_DIRS = frozenset({".git", "node_modules", "venv", ".venv", "__pycache__"})
+
+# Threads used to read files concurrently; reads are I/O bound, so several per core
+FILE_READ_WORKERS = min(32, (os.cpu_count() or 4) * 4)
 
 
 class RepoAnalyzer:
@@ -31,7 +41,7 @@ class RepoAnalyzer:
         self.logger = logging.getLogger(__name__)
         self.llm_client = LLMClient()
         self.parser = CodeParser()
-        self.summarizer = CodeSummarizer(llm_client=self.llm_client)
+        self.summarizer = CodeSummarizer(db_client=self.db_client, llm_client=self.llm_client)
     
     def analyze_repository(self, repo_id: str) -> Dict:
         """
@@ -56,24 +66,43 @@ class RepoAnalyzer:
                 
             # List all files in the repository
             all_files = []
-            for root, _, files in os.walk(temp_dir):
+            for root, dirs, files in os.walk(temp_dir):
+                # Prune skipped directories so their contents are never listed
+                dirs[:] = [d for d in dirs if d not in SKIPPED_DIRS]
                 for file in files:
-                    # Skip hidden files and directories
-                    if file.startswith('.') or '/.git/' in root:
+                    # Skip hidden files and files that are binary by extension
+                    if file.startswith('.') or LanguageDetector.is_binary_path(file):
                         continue
                     
                     full_path = os.path.join(root, file)
                     rel_path = os.path.relpath(full_path, temp_dir)
                     all_files.append(rel_path)
                     
+            # Metrics are only written by a completed analysis, so without them
+            # no files are stored yet and batches can be inserted directly
+            first_ingest = repository.metrics is None
+            
             # Process files in batches
             batch_size = 10
             file_batches = [all_files[i:i + batch_size] for i in range(0, len(all_files), batch_size)]
             
             all_processed_files = []
-            for batch in file_batches:
-                processed_batch = self._process_file_batch(repository, temp_dir, batch)
-                all_processed_files.extend(processed_batch)
+            with ThreadPoolExecutor(max_workers=FILE_READ_WORKERS) as read_pool, \
+                    self.db_client.batch(repository.id, first_ingest=first_ingest) as writes:
+                def read_batch(batch):
+                    # map submits every read at once and yields them in order
+                    return read_pool.map(lambda path: self._read_file(path, temp_dir), batch)
+                
+                pending_reads = read_batch(file_batches[0]) if file_batches else None
+                for index, batch in enumerate(file_batches):
+                    file_texts = list(pending_reads)
+                    # Read the next batch while this one is parsed and summarized
+                    if index + 1 < len(file_batches):
+                        pending_reads = read_batch(file_batches[index + 1])
+                    processed_batch = self._process_file_batch(repository, temp_dir, batch, writes, file_texts)
+                    # Keep only what metrics and the summary need; contents
+                    # leave memory once the write buffer flushes them
+                    all_processed_files.extend(self._file_record(file, temp_dir) for file in processed_batch)
                 
             # Calculate repository metrics
             metrics = self._calculate_repository_metrics(all_processed_files)
@@ -92,6 +121,8 @@ class RepoAnalyzer:
                 metrics=metrics,
                 status="analyzed"
             )
+            # Answers given before this analysis may now be outdated
+            query_response_cache.invalidate(repo_id)
             
             self.logger.info(f"Analysis complete for repository {repo_id}")
             return {
@@ -226,7 +257,7 @@ class RepoAnalyzer:
             # Get total lines and file count
             total_lines = 0
             file_count = 0
-            files_cursor = self.db_client.db.files.find({"repo_id": repo_id})
+            files_cursor = self.db_client.db.files.find({"repo_id": repo_id}, {"line_count": 1, "_id": 0})
             for file in files_cursor:
                 total_lines += file.get("line_count", 0)
                 file_count += 1
@@ -242,28 +273,70 @@ class RepoAnalyzer:
             self.logger.error(f"Error calculating repository metrics for {repo_id}: {str(e)}")
             return {"error": str(e)}
 
-    def _process_file(self, repository: Repository, file_path: str, temp_dir: str) -> Dict:
+    def _read_file(self, file_path: str, temp_dir: str) -> Optional[Dict[str, Any]]:
         """
-        Process a single file from the repository
+        Read a repository file as text, skipping missing, large and binary files.
+        
+        Args:
+            file_path: Path relative to the repository root
+            temp_dir: Repository root directory
+            
+        Returns:
+            dict: File content with its line count and size, or None if the file is skipped
         """
         try:
             full_path = os.path.join(temp_dir, file_path)
-            if not os.path.exists(full_path) or os.path.isdir(full_path):
+            # One stat answers existence, type and size
+            try:
+                file_stat = os.stat(full_path)
+            except OSError:
+                file_stat = None
+            if file_stat is None or not stat.S_ISREG(file_stat.st_mode):
                 self.logger.warning(f"File not found or is directory: {full_path}")
                 return None
 
             # Skip large files
-            if os.path.getsize(full_path) > 10 * 1024 * 1024:  # 10MB
+            if file_stat.st_size > 10 * 1024 * 1024:  # 10MB
                 self.logger.warning(f"File too large to process: {file_path}")
                 return None
 
-            # Skip binary files
+            # Read the bytes in one call and decode once, skipping binary files
+            with open(full_path, 'rb') as f:
+                raw_content = f.read()
+            if LanguageDetector.looks_binary(raw_content):
+                self.logger.warning(f"Binary file, skipping: {file_path}")
+                return None
             try:
-                with open(full_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
+                content = raw_content.decode('utf-8')
             except UnicodeDecodeError:
                 self.logger.warning(f"Binary file, skipping: {file_path}")
                 return None
+            
+            # Normalize newlines as text mode would, only when there are any to change
+            if '\r' in content:
+                content = content.replace('\r\n', '\n').replace('\r', '\n')
+            return {
+                "content": content,
+                # Counted on the bytes, which is cheaper than on the decoded text
+                "line_count": raw_content.count(b'\n') + 1,
+                "size_bytes": len(raw_content)
+            }
+                
+        except Exception as e:
+            self.logger.error(f"Error reading file {file_path}: {str(e)}")
+            return None
+
+    def _process_file(self, repository: Repository, file_path: str, temp_dir: str, 
+                      file_text: Optional[Dict[str, Any]] = None) -> Dict:
+        """
+        Process a single file from the repository, reading it unless its text is given
+        """
+        try:
+            if file_text is None:
+                file_text = self._read_file(file_path, temp_dir)
+                if file_text is None:
+                    return None
+            content = file_text["content"]
 
             # Parse language and extract info
             language = self.parser.language_detector.detect_language(file_path, content)
@@ -274,6 +347,8 @@ class RepoAnalyzer:
                 "path": file_path,
                 "language": language,
                 "content": content,
+                "line_count": file_text["line_count"],
+                "size_bytes": file_text["size_bytes"],
                 "functions": functions,
                 "documentation": documentation
             }
@@ -297,31 +372,58 @@ class RepoAnalyzer:
             self.logger.error(f"Error processing file {file_path}: {str(e)}")
             return None
 
-    def _process_file_batch(self, repository: "Repository", temp_dir: str, files: List[str]) -> List[Dict]:
+    def _process_file_batch(self, repository: "Repository", temp_dir: str, files: List[str], 
+                            writes: WriteBatch, file_texts: Optional[List[Optional[Dict[str, Any]]]] = None) -> List[Dict]:
         """
-        Process a batch of files from the repository
+        Process a batch of files from the repository, reading them unless their texts are given
         """
+        if file_texts is None:
+            # Reads are I/O bound, so overlap them before the CPU- and LLM-bound processing
+            with ThreadPoolExecutor(max_workers=min(FILE_READ_WORKERS, len(files) or 1)) as pool:
+                file_texts = list(pool.map(lambda path: self._read_file(path, temp_dir), files))
+        
         results = []
-        for file_path in files:
+        for file_path, file_text in zip(files, file_texts):
+            if file_text is None:
+                continue
             try:
-                processed_file = self._process_file(repository, file_path, temp_dir)
+                processed_file = self._process_file(repository, file_path, temp_dir, file_text)
                 if processed_file:
                     results.append(processed_file)
-                    
-                    # Save file to database
-                    self.db_client.save_file(
-                        repository_id=repository.id,
-                        file_path=processed_file["path"],
-                        language=processed_file["language"],
-                        content=processed_file["content"],
-                        functions=processed_file["functions"],
-                        documentation=processed_file["documentation"],
-                        summary=processed_file.get("summary", "")
-                    )
             except Exception as e:
                 self.logger.error(f"Error in file batch processing for {file_path}: {str(e)}")
+        
+        # Hand the batch to the write buffer, which saves in bulk
+        writes.add_files(results)
         return results
 
+    @staticmethod
+    def _file_record(file_data: Dict[str, Any], temp_dir: str) -> Dict[str, Any]:
+        """
+        Strip a processed file down to its metadata, re-reading its content on demand
+        
+        Args:
+            file_data: Processed file data
+            temp_dir: Repository directory the file was read from
+            
+        Returns:
+            dict: File data without content, comments or function code, with a loader for the raw bytes
+        """
+        full_path = os.path.join(temp_dir, file_data["path"])
+        
+        def load() -> bytes:
+            with open(full_path, 'rb') as f:
+                return f.read()
+        
+        record = {key: value for key, value in file_data.items() if key not in ("content", "functions", "documentation")}
+        # Metrics count the functions and the summary names them; their code stays out
+        record["functions"] = [
+            {"name": func["name"], "start_line": func["start_line"], "end_line": func["end_line"]}
+            for func in file_data.get("functions", [])
+        ]
+        record["_loader"] = load
+        return record
+
     def _calculate_repository_metrics(self, files: List[Dict]) -> Dict:
         """
         Calculate metrics for the repository
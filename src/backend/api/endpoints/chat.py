@@ -8,7 +8,6 @@ import traceback
 from typing import Dict, Any, Optional
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-from bson import ObjectId
 
 from src.backend.database.db_client import DBClient
 from src.backend.llm.query_processor import QueryProcessor
@@ -64,38 +63,23 @@ async def process_chat_message(repo_id: str, request: ChatRequest):
         logger.info(f"Processing chat message for repository {repo_id}")
         
         # Check if repository exists
-        repo = None
         try:
-            # Try with ObjectId first if valid
-            if ObjectId.is_valid(repo_id):
-                repo = db_client.db.repositories.find_one({"_id": ObjectId(repo_id)})
-                
-            # If not found, try with string ID
-            if not repo:
-                repo = db_client.db.repositories.find_one({"_id": repo_id})
-                
+            # Existence check only, so leave the document undecoded
+            repo = db_client.get_repository_raw(repo_id)
             if not repo:
                 raise HTTPException(status_code=404, detail="Repository not found")
         except Exception as e:
             logger.error(f"Error finding repository: {str(e)}")
             raise HTTPException(status_code=404, detail=f"Repository not found: {str(e)}")
         
-        # Process the query - use message field as the query for compatibility with frontend
+        # Process the query - use message field as the query for compatibility with frontend;
+        # the processor saves the query and response to the history itself
         response = await query_processor.process_query(
             repo_id,
             request.message,
             context=request.context
         )
         
-        # Store the query and response in the database
-        query_doc = {
-            "repo_id": repo_id,
-            "query": request.message,
-            "response": response,
-            "timestamp": db_client.db.client.server_info().get("localTime", None)
-        }
-        db_client.db.queries.insert_one(query_doc)
-        
         return response
     except HTTPException:
         raise
@@ -3,6 +3,7 @@ API routes for RepoMind.
 Handles API requests for repositories, files, and queries.
 """
 
+import json
 import logging
 import os
 import sys
@@ -17,14 +18,21 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent.parent))
 
 # Python-multipart is imported implicitly by FastAPI
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, File, UploadFile, Form, Query, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, Field
 
 from src.backend.database.schema import Repository, GitHubRepository, ZipRepository, LocalRepository, FileInfo, Function, Query as QueryModel
-from src.backend.database.db_client import DBClient
+from src.backend.database.db_client import DBClient, id_candidates
 from src.backend.repo_manager.repo_loader import RepoLoader
 from src.backend.analyzer.repo_analyzer import RepoAnalyzer
 from src.backend.llm.query_processor import QueryProcessor
+from src.backend.llm.query_cache import query_response_cache
+
+try:
+    # orjson encodes documents (including datetimes) in C
+    import orjson
+except ImportError:
+    orjson = None
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -33,6 +41,35 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter(prefix="/api", tags=["API"])
 
+def _bson_default(value: Any) -> str:
+    """Encode the BSON types JSON encoders do not know about."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _documents_response(documents: Any) -> Response:
+    """
+    Serialize MongoDB documents straight to a JSON response.
+    
+    ObjectIds become strings and datetimes ISO 8601 strings during encoding,
+    so handlers need not convert each document first.
+    
+    Args:
+        documents: Documents, or any JSON-compatible structure containing them
+        
+    Returns:
+        Response: JSON response
+    """
+    if orjson is not None:
+        content = orjson.dumps(documents, default=_bson_default)
+    else:
+        content = json.dumps(documents, default=_bson_default, ensure_ascii=False, separators=(",", ":"))
+    return Response(content=content, media_type="application/json")
+
+
 # Create MongoDB client
 try:
     print("Initializing MongoDB client...")
@@ -95,17 +132,7 @@ async def get_repositories():
         repositories = list(db_client.db.repositories.find())
         print(f"Found {len(repositories)} repositories")
         
-        # Convert MongoDB documents to JSON-serializable format
         for repo in repositories:
-            # Convert ObjectId to string
-            if "_id" in repo and isinstance(repo["_id"], ObjectId):
-                repo["_id"] = str(repo["_id"])
-            
-            # Convert dates to strings
-            if "created_at" in repo and repo["created_at"]:
-                if isinstance(repo["created_at"], datetime):
-                    repo["created_at"] = repo["created_at"].isoformat()
-            
             # Ensure source_type is set
             if "source_type" not in repo or not repo["source_type"]:
                 if "type" in repo and repo["type"]:
@@ -113,7 +140,8 @@ async def get_repositories():
                 else:
                     repo["source_type"] = "Unknown"
         
-        return repositories
+        # ObjectIds and dates are converted while encoding
+        return _documents_response(repositories)
     except Exception as e:
         print(f"Error fetching repositories: {str(e)}")
         traceback.print_exc()
@@ -132,13 +160,8 @@ async def get_repository(repo_id: str):
         Repository: Repository details
     """
     try:
-        # Try with the original ID first
-        repo = db_client.db.repositories.find_one({"_id": repo_id})
-        
-        # If not found and ID is a valid ObjectId, try with ObjectId
-        if not repo and ObjectId.is_valid(repo_id):
-            repo = db_client.db.repositories.find_one({"_id": ObjectId(repo_id)})
-            
+        # Match the string ID and its ObjectId form in one query
+        repo = db_client.db.repositories.find_one({"_id": {"$in": id_candidates(repo_id)}})
         if not repo:
             raise HTTPException(status_code=404, detail="Repository not found")
             
@@ -179,18 +202,11 @@ async def delete_repository(repo_id: str):
         dict: Success message
     """
     try:
-        result = db_client.db.repositories.delete_one({"_id": repo_id})
-        if result.deleted_count == 0:
-            # Try with ObjectId if string ID didn't work
-            if ObjectId.is_valid(repo_id):
-                result = db_client.db.repositories.delete_one({"_id": ObjectId(repo_id)})
-                if result.deleted_count == 0:
-                    raise HTTPException(status_code=404, detail="Repository not found")
-        
-        # Delete all related data
-        db_client.db.files.delete_many({"repo_id": repo_id})
-        db_client.db.functions.delete_many({"repo_id": repo_id})
-        db_client.db.queries.delete_many({"repo_id": repo_id})
+        # Deleting through the client also evicts its cached reads
+        deleted = db_client.delete_repository(repo_id)
+        query_response_cache.invalidate(repo_id)
+        if not deleted:
+            raise HTTPException(status_code=404, detail="Repository not found")
         
         return {"message": "Repository deleted successfully"}
     except HTTPException:
@@ -219,11 +235,12 @@ async def get_file_content(repo_id: str, path: str = Query(...)):
         # Get functions in this file
         functions = db_client.db.functions.find({"repo_id": repo_id, "file_path": path})
         
+        # Analyzed files carry their counts; older documents are measured here
         return {
             "path": file["path"],
             "content": file["content"],
-            "size_bytes": len(file["content"]),
-            "line_count": file["content"].count('\n') + 1,
+            "size_bytes": file.get("size_bytes") or len(file["content"]),
+            "line_count": file.get("line_count") or file["content"].count('\n') + 1,
             "language": file["language"],
             "functions": list(functions)
         }
@@ -246,14 +263,9 @@ async def get_repository_structure(repo_id: str):
     """
     try:
         # Try to find repository by ID
-        repo = None
         try:
-            if ObjectId.is_valid(repo_id):
-                repo = db_client.db.repositories.find_one({"_id": ObjectId(repo_id)})
-            
-            if not repo:
-                repo = db_client.db.repositories.find_one({"_id": repo_id})
-                
+            # Only the name is read, so leave the rest of the document undecoded
+            repo = db_client.get_repository_raw(repo_id)
             if not repo:
                 raise HTTPException(status_code=404, detail="Repository not found")
         except Exception as e:
@@ -373,14 +385,8 @@ async def get_repository_components(repo_id: str):
         List[dict]: List of key components
     """
     try:
-        # Try with ObjectId if valid
-        if ObjectId.is_valid(repo_id):
-            repo = db_client.db.repositories.find_one({"_id": ObjectId(repo_id)})
-        
-        # If not found, try with string ID
-        if not repo:
-            repo = db_client.db.repositories.find_one({"_id": repo_id})
-            
+        # Existence check only, so leave the document undecoded
+        repo = db_client.get_repository_raw(repo_id)
         if not repo:
             raise HTTPException(status_code=404, detail="Repository not found")
         
@@ -434,14 +440,8 @@ async def analyze_repository_element(repo_id: str, query_request: QueryRequest):
         dict: Analysis results
     """
     try:
-        # Try with ObjectId if valid
-        if ObjectId.is_valid(repo_id):
-            repo = db_client.db.repositories.find_one({"_id": ObjectId(repo_id)})
-        
-        # If not found, try with string ID
-        if not repo:
-            repo = db_client.db.repositories.find_one({"_id": repo_id})
-            
+        # Existence check only, so leave the document undecoded
+        repo = db_client.get_repository_raw(repo_id)
         if not repo:
             raise HTTPException(status_code=404, detail="Repository not found")
         
@@ -484,15 +484,8 @@ async def get_repository_queries(repo_id: str, limit: int = 10):
         List[dict]: List of queries and responses
     """
     try:
-        repo = None
-        # Try with ObjectId first if valid
-        if ObjectId.is_valid(repo_id):
-            repo = db_client.db.repositories.find_one({"_id": ObjectId(repo_id)})
-        
-        # If not found, try with string ID
-        if not repo:
-            repo = db_client.db.repositories.find_one({"_id": repo_id})
-            
+        # Existence check only, so leave the document undecoded
+        repo = db_client.get_repository_raw(repo_id)
         if not repo:
             raise HTTPException(status_code=404, detail="Repository not found")
         
@@ -502,16 +495,8 @@ async def get_repository_queries(repo_id: str, limit: int = 10):
             limit=limit
         ))
         
-        # Convert ObjectId to string for JSON serialization
-        for query in queries:
-            if "_id" in query and isinstance(query["_id"], ObjectId):
-                query["_id"] = str(query["_id"])
-                
-            # Convert timestamp to ISO format if it's a datetime
-            if "timestamp" in query and query["timestamp"] and isinstance(query["timestamp"], datetime):
-                query["timestamp"] = query["timestamp"].isoformat()
-        
-        return queries
+        # ObjectIds and timestamps are converted while encoding
+        return _documents_response(queries)
     except HTTPException:
         raise
     except Exception as e:
@@ -537,16 +522,9 @@ async def chat_with_repository(repo_id: str, request: ChatRequest):
         logger.info(f"Processing chat message for repository {repo_id}")
         
         # Check if repository exists
-        repo = None
         try:
-            # Try with ObjectId first if valid
-            if ObjectId.is_valid(repo_id):
-                repo = db_client.db.repositories.find_one({"_id": ObjectId(repo_id)})
-                
-            # If not found, try with string ID
-            if not repo:
-                repo = db_client.db.repositories.find_one({"_id": repo_id})
-                
+            # Existence check only, so leave the document undecoded
+            repo = db_client.get_repository_raw(repo_id)
             if not repo:
                 raise HTTPException(status_code=404, detail="Repository not found")
         except Exception as e:
@@ -6,8 +6,141 @@ Extracts functions and methods from code files based on language-specific rules.
 import re
 import ast
 import logging
+from bisect import bisect_left, bisect_right
 from typing import List, Dict, Any, Optional, Tuple
 
+try:
+    # google-re2 matches in linear time, which keeps the brace-heavy patterns
+    # below from backtracking catastrophically on large files
+    import re2 as _re
+except ImportError:
+    _re = re
+
+try:
+    # Hyperscan can sweep several patterns over a buffer in a single pass
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+
+# Data, markup and documentation languages that never contain functions
+_NON_CODE_LANGUAGES = frozenset({
+    'json', 'yaml', 'xml', 'toml', 'ini', 'csv', 'tsv',
+    'markdown', 'restructuredtext', 'latex', 'html', 'css', 'sql',
+})
+
+# JavaScript/TypeScript patterns
+_JS_TS_FUNCTION_PATTERNS = [
+    # Function declarations
+    _re.compile(r'function\s+([a-zA-Z_$][a-zA-Z0-9_$]*)\s*\(([^)]*)\)\s*\{'),
+    # Arrow functions with explicit name (const/let/var)
+    _re.compile(r'(?:const|let|var)\s+([a-zA-Z_$][a-zA-Z0-9_$]*)\s*=\s*(?:async\s*)?\([^)]*\)\s*=>\s*\{'),
+    # Method definitions in classes
+    _re.compile(r'(?:async\s+)?([a-zA-Z_$][a-zA-Z0-9_$]*)\s*\(([^)]*)\)\s*\{'),
+]
+_JS_TS_CLASS_PATTERN = _re.compile(r'class\s+([a-zA-Z_$][a-zA-Z0-9_$]*)\s*\{')
+_JS_TS_METHOD_PATTERN = _re.compile(r'(?:async\s+)?([a-zA-Z_$][a-zA-Z0-9_$]*)\s*\(([^)]*)\)\s*\{')
+
+# C/C++ function pattern (simplified, won't catch all C/C++ functions)
+_C_CPP_FUNCTION_PATTERN = _re.compile(
+    r'(?s)(?:[\w:]+\s+)+(\w+)\s*\(([^)]*)\)\s*(?:const)?\s*(?:override)?\s*(?:final)?'
+    r'\s*(?:=\s*(?:default|delete|0))?\s*(?:noexcept)?\s*\{(?:[^{}]|\{(?:[^{}]|\{[^{}]*\})*\})*\}'
+)
+
+# Java tokens: a class declaration, a method header up to its opening brace,
+# or a lone brace, matched in a single left-to-right pass
+_JAVA_TOKEN_PATTERN = _re.compile(
+    r'class\s+(\w+)'
+    r'|(?:public|private|protected|static|\s) +(?:[\w<>\[\]]+\s+)+(\w+) *\(([^)]*)\) *(?:throws [^{]+)? *\{'
+    r'|([{}])'
+)
+
+# Ruby patterns
+_RUBY_CLASS_PATTERN = _re.compile(r'class\s+(\w+)')
+_RUBY_METHOD_PATTERN = _re.compile(r'def\s+(\w+)(?:\(([^)]*)\))?')
+_RUBY_END_PATTERN = _re.compile(r'\bend\b')
+
+# Go and Rust patterns
+_GO_FUNCTION_PATTERN = _re.compile(r'func\s+(\w+)\s*\(([^)]*)\)\s*(?:\([^)]*\))?\s*\{')
+_RUST_FUNCTION_PATTERN = _re.compile(r'(?:pub\s+)?fn\s+(\w+)\s*(?:<[^>]*>)?\s*\(([^)]*)\)(?:\s*->\s*[^{]*)?')
+
+# Braces, for matching function bodies
+_BRACE_PATTERN = re.compile(r'[{}]')
+
+# Generic function patterns (will catch many common forms but not all)
+_GENERIC_FUNCTION_PATTERNS = [
+    # Standard function declaration
+    _re.compile(r'(?:function|func|def|fn)\s+(\w+)\s*\(([^)]*)\)'),
+    # Method declaration
+    _re.compile(r'(?:public|private|protected|static)?\s+(?:\w+\s+)*(\w+)\s*\(([^)]*)\)\s*\{'),
+    # Arrow function with name
+    _re.compile(r'(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?\([^)]*\)\s*=>'),
+]
+
+
+def _compile_pattern_database(patterns: List[Any]) -> Optional[Any]:
+    """
+    Compile patterns into a single Hyperscan database.
+    
+    Args:
+        patterns: Compiled regex patterns
+        
+    Returns:
+        Database: Hyperscan database, or None if Hyperscan is unavailable
+    """
+    if hyperscan is None:
+        return None
+    
+    flags = hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+    try:
+        database = hyperscan.Database()
+        database.compile(
+            expressions=[pattern.pattern.encode('utf-8') for pattern in patterns],
+            ids=list(range(len(patterns))),
+            elements=len(patterns),
+            flags=[flags] * len(patterns)
+        )
+        return database
+    except Exception as e:
+        logging.getLogger(__name__).warning("Failed to compile Hyperscan database: %s", str(e))
+        return None
+
+
+def _matching_patterns(database: Optional[Any], patterns: List[Any], content: str) -> List[Any]:
+    """
+    Select the patterns that match somewhere in the content.
+    
+    A single Hyperscan pass reports which patterns occur at all, so the
+    per-pattern finditer sweeps only run where there is something to find.
+    
+    Args:
+        database: Hyperscan database compiled from patterns, or None
+        patterns: Compiled regex patterns
+        content: Content to scan
+        
+    Returns:
+        list: Matching patterns in their original order (all patterns if Hyperscan is unavailable)
+    """
+    if database is None:
+        return patterns
+    
+    hits = set()
+    
+    def on_match(pattern_id, start, end, flags, context):
+        hits.add(pattern_id)
+    
+    try:
+        database.scan(content.encode('utf-8'), match_event_handler=on_match)
+    except Exception:
+        return patterns
+    
+    return [pattern for i, pattern in enumerate(patterns) if i in hits]
+
+
+_JS_TS_ALL_PATTERNS = _JS_TS_FUNCTION_PATTERNS + [_JS_TS_CLASS_PATTERN]
+_JS_TS_PATTERN_DATABASE = _compile_pattern_database(_JS_TS_ALL_PATTERNS)
+_GENERIC_PATTERN_DATABASE = _compile_pattern_database(_GENERIC_FUNCTION_PATTERNS)
+
 
 class FunctionExtractor:
     """Extracts functions from code files."""
@@ -31,6 +164,10 @@ class FunctionExtractor:
         # Normalize language name for handler selection
         normalized_lang = language.lower().split()[0].split('(')[0]
         
+        # Skip non-code files instead of running the generic regex sweeps over them
+        if normalized_lang in _NON_CODE_LANGUAGES:
+            return []
+        
         try:
             # Dispatch to specific handler based on language
             if normalized_lang == 'python':
@@ -56,15 +193,34 @@ class FunctionExtractor:
     
     def _extract_python_functions(self, content: str, file_path: str) -> List[Dict[str, Any]]:
         """Extract functions from Python code."""
+        # Without a def keyword there is nothing to extract, so skip parsing
+        if 'def' not in content:
+            return []
+        
+        # ast also breaks lines at \r\n and a bare \r; normalize them so the
+        # line offsets below match node line numbers and code has \n endings
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        
         functions = []
         
         try:
-            tree = ast.parse(content)
-            
-            # Helper function to get code lines for a node
-            def get_node_code(node):
-                lines = content.splitlines()
-                return "\n".join(lines[node.lineno-1:node.end_lineno])
+            tree = ast.parse(content, type_comments=False)
+
+            # Precompute the offset at which each line starts so node code
+            # can be sliced directly instead of re-splitting the file per node
+            line_offsets = [0]
+            for match in re.finditer('\n', content):
+                line_offsets.append(match.end())
+
+            # Helper function to get the source span of a node's lines
+            def get_node_span(node):
+                start = line_offsets[node.lineno - 1]
+                if node.end_lineno < len(line_offsets):
+                    end = line_offsets[node.end_lineno] - 1
+                else:
+                    end = len(content)
+                return start, end
             
             for node in ast.walk(tree):
                 # Extract functions
@@ -84,13 +240,16 @@ class FunctionExtractor:
                     # Get function docstring if it exists
                     docstring = ast.get_docstring(node) or ""
                     
+                    # Get the span of the function source
+                    start_pos, end_pos = get_node_span(node)
+                    
                     functions.append({
                         "name": node.name,
                         "signature": signature,
                         "description": docstring,
                         "start_line": node.lineno,
                         "end_line": node.end_lineno,
-                        "code": get_node_code(node)
+                        "code": content[start_pos:end_pos]
                     })
                 
                 # Extract class methods
@@ -112,13 +271,16 @@ class FunctionExtractor:
                             # Get method docstring if it exists
                             docstring = ast.get_docstring(child) or ""
                             
+                            # Get the span of the method source
+                            start_pos, end_pos = get_node_span(child)
+                            
                             functions.append({
                                 "name": f"{node.name}.{child.name}",
                                 "signature": signature,
                                 "description": docstring,
                                 "start_line": child.lineno,
                                 "end_line": child.end_lineno,
-                                "code": get_node_code(child)
+                                "code": content[start_pos:end_pos]
                             })
             
             return functions
@@ -128,30 +290,21 @@ class FunctionExtractor:
     
     def _extract_js_ts_functions(self, content: str, file_path: str) -> List[Dict[str, Any]]:
         """Extract functions from JavaScript/TypeScript code."""
-        functions = []
+        # Without an opening brace none of the patterns can match, so skip the regex work
+        if '{' not in content:
+            return []
         
-        # Function declaration patterns
-        patterns = [
-            # Function declarations
-            r'function\s+([a-zA-Z_$][a-zA-Z0-9_$]*)\s*\(([^)]*)\)\s*{',
-            # Arrow functions with explicit name (const/let/var)
-            r'(?:const|let|var)\s+([a-zA-Z_$][a-zA-Z0-9_$]*)\s*=\s*(?:async\s*)?\([^)]*\)\s*=>\s*{',
-            # Method definitions in classes
-            r'(?:async\s+)?([a-zA-Z_$][a-zA-Z0-9_$]*)\s*\(([^)]*)\)\s*{',
-            # Class methods
-            r'class\s+([a-zA-Z_$][a-zA-Z0-9_$]*)\s*{',
-        ]
+        functions = []
         
         # Find all potential functions
-        lines = content.splitlines()
-        for pattern in patterns:
-            matches = re.finditer(pattern, content)
+        for pattern in _matching_patterns(_JS_TS_PATTERN_DATABASE, _JS_TS_ALL_PATTERNS, content):
+            matches = pattern.finditer(content)
             for match in matches:
                 start_pos = match.start()
-                line_no = content[:start_pos].count('\n') + 1
+                line_no = content.count('\n', 0, start_pos) + 1
                 
                 # Get the function name
-                if 'class' in pattern:
+                if pattern is _JS_TS_CLASS_PATTERN:
                     # For classes, we need to extract methods separately
                     class_name = match.group(1)
                     class_start = line_no
@@ -159,23 +312,21 @@ class FunctionExtractor:
                     class_body = content[match.end():class_end]
                     
                     # Find methods in class
-                    method_pattern = r'(?:async\s+)?([a-zA-Z_$][a-zA-Z0-9_$]*)\s*\(([^)]*)\)\s*{'
-                    method_matches = re.finditer(method_pattern, class_body)
+                    method_matches = _JS_TS_METHOD_PATTERN.finditer(class_body)
                     for method_match in method_matches:
                         method_name = method_match.group(1)
                         method_params = method_match.group(2)
                         method_start_pos = match.end() + method_match.start()
-                        method_line_no = content[:method_start_pos].count('\n') + 1
+                        method_line_no = content.count('\n', 0, method_start_pos) + 1
                         method_end = self._find_closing_brace(content, method_start_pos + method_match.end() - method_match.start())
-                        method_code = content[method_start_pos:method_end]
                         
                         functions.append({
                             "name": f"{class_name}.{method_name}",
                             "signature": f"{method_name}({method_params})",
                             "description": "",  # JS/TS doesn't have standard docstrings
                             "start_line": method_line_no,
-                            "end_line": content[:method_end].count('\n') + 1,
-                            "code": method_code
+                            "end_line": content.count('\n', 0, method_end) + 1,
+                            "code": content[method_start_pos:method_end]
                         })
                 else:
                     # Regular functions or named arrow functions
@@ -184,7 +335,7 @@ class FunctionExtractor:
                     
                     # Find the end of the function (closing brace)
                     end_pos = self._find_closing_brace(content, match.end())
-                    end_line = content[:end_pos].count('\n') + 1
+                    end_line = content.count('\n', 0, end_pos) + 1
                     
                     functions.append({
                         "name": function_name,
@@ -199,13 +350,13 @@ class FunctionExtractor:
     
     def _extract_c_cpp_functions(self, content: str, file_path: str) -> List[Dict[str, Any]]:
         """Extract functions from C/C++ code."""
-        functions = []
+        # Without an opening brace the function pattern cannot match, so skip the regex work
+        if '{' not in content:
+            return []
         
-        # Function declaration pattern (simplified)
-        # This is a simplified pattern and won't catch all C/C++ functions
-        pattern = r'(?:[\w:]+\s+)+(\w+)\s*\(([^)]*)\)\s*(?:const)?\s*(?:override)?\s*(?:final)?\s*(?:=\s*(?:default|delete|0))?\s*(?:noexcept)?\s*{(?:[^{}]|{(?:[^{}]|{[^{}]*})*})*}'
+        functions = []
         
-        matches = re.finditer(pattern, content, re.DOTALL)
+        matches = _C_CPP_FUNCTION_PATTERN.finditer(content)
         for match in matches:
             function_name = match.group(1)
             params = match.group(2)
@@ -213,8 +364,8 @@ class FunctionExtractor:
             # Get line numbers
             start_pos = match.start()
             end_pos = match.end()
-            start_line = content[:start_pos].count('\n') + 1
-            end_line = content[:end_pos].count('\n') + 1
+            start_line = content.count('\n', 0, start_pos) + 1
+            end_line = content.count('\n', 0, end_pos) + 1
             
             functions.append({
                 "name": function_name,
@@ -222,41 +373,54 @@ class FunctionExtractor:
                 "description": "",
                 "start_line": start_line,
                 "end_line": end_line,
-                "code": match.group(0)
+                "code": content[start_pos:end_pos]
             })
         
         return functions
     
     def _extract_java_functions(self, content: str, file_path: str) -> List[Dict[str, Any]]:
         """Extract methods from Java code."""
-        functions = []
-        
-        # Class pattern
-        class_pattern = r'class\s+(\w+)'
-        classes = re.finditer(class_pattern, content)
+        # Without an opening brace none of the patterns can match, so skip the regex work
+        if '{' not in content:
+            return []
         
-        current_class = None
-        for class_match in classes:
-            current_class = class_match.group(1)
+        functions = []
         
-        # Method pattern (simplified)
-        method_pattern = r'(?:public|private|protected|static|\s) +(?:[\w\<\>\[\]]+\s+)+(\w+) *\([^\)]*\) *(?:throws [^{]+)? *\{'
+        # Keep one frame per open brace, holding the class name when the brace
+        # opens a class body, so each method resolves to its innermost class
+        brace_frames = []
+        pending_class = None
         
-        matches = re.finditer(method_pattern, content)
-        for match in matches:
-            method_name = match.group(1)
+        for token in _JAVA_TOKEN_PATTERN.finditer(content):
+            class_name, method_name, params, brace = token.groups()
+            
+            if class_name is not None:
+                pending_class = class_name
+                continue
+            
+            if brace == '{':
+                brace_frames.append(pending_class)
+                pending_class = None
+                continue
+            
+            if brace == '}':
+                if brace_frames:
+                    brace_frames.pop()
+                continue
+            
+            current_class = next((frame for frame in reversed(brace_frames) if frame), None)
+            
+            # The method token already consumed the opening brace of its body
+            brace_frames.append(None)
+            pending_class = None
             
             # Get method body
-            start_pos = match.start()
-            end_pos = self._find_closing_brace(content, match.end())
+            start_pos = token.start()
+            end_pos = self._find_closing_brace(content, token.end())
             
             # Get line numbers
-            start_line = content[:start_pos].count('\n') + 1
-            end_line = content[:end_pos].count('\n') + 1
-            
-            # Extract parameters
-            params_match = re.search(r'\((.*?)\)', content[start_pos:match.end()])
-            params = params_match.group(1) if params_match else ""
+            start_line = content.count('\n', 0, start_pos) + 1
+            end_line = content.count('\n', 0, end_pos) + 1
             
             full_name = f"{current_class}.{method_name}" if current_class else method_name
             
@@ -273,20 +437,25 @@ class FunctionExtractor:
     
     def _extract_ruby_functions(self, content: str, file_path: str) -> List[Dict[str, Any]]:
         """Extract methods from Ruby code."""
-        functions = []
+        # Without a def keyword none of the patterns can match, so skip the regex work
+        if 'def' not in content:
+            return []
         
-        # Class pattern
-        class_pattern = r'class\s+(\w+)'
-        classes = re.finditer(class_pattern, content)
+        functions = []
         
-        current_class = None
-        for class_match in classes:
-            current_class = class_match.group(1)
+        # Record where each class starts so methods can be attributed to the
+        # closest class declared before them
+        class_starts = []
+        class_names = []
+        for class_match in _RUBY_CLASS_PATTERN.finditer(content):
+            class_starts.append(class_match.start())
+            class_names.append(class_match.group(1))
         
-        # Method pattern
-        method_pattern = r'def\s+(\w+)(?:\(([^)]*)\))?'
+        # Locate every end keyword once so each method can bisect to its own
+        end_spans = [end_match.span() for end_match in _RUBY_END_PATTERN.finditer(content)]
+        end_starts = [start for start, _ in end_spans]
         
-        matches = re.finditer(method_pattern, content)
+        matches = _RUBY_METHOD_PATTERN.finditer(content)
         for match in matches:
             method_name = match.group(1)
             params = match.group(2) if match.group(2) else ""
@@ -294,24 +463,19 @@ class FunctionExtractor:
             # Get method body
             start_pos = match.start()
             
-            # Find the end of the method (end keyword)
-            end_pattern = r'\bend\b'
-            end_matches = re.finditer(end_pattern, content[match.end():])
-            
-            # Take the first end that matches the method level
-            if end_matches:
-                end_match = next(end_matches, None)
-                if end_match:
-                    end_pos = match.end() + end_match.end()
-                else:
-                    end_pos = len(content)
+            # Find the end of the method (first end keyword after the signature)
+            end_index = bisect_left(end_starts, match.end())
+            if end_index < len(end_spans):
+                end_pos = end_spans[end_index][1]
             else:
                 end_pos = len(content)
             
             # Get line numbers
-            start_line = content[:start_pos].count('\n') + 1
-            end_line = content[:end_pos].count('\n') + 1
+            start_line = content.count('\n', 0, start_pos) + 1
+            end_line = content.count('\n', 0, end_pos) + 1
             
+            class_index = bisect_right(class_starts, start_pos) - 1
+            current_class = class_names[class_index] if class_index >= 0 else None
             full_name = f"{current_class}.{method_name}" if current_class else method_name
             
             functions.append({
@@ -327,12 +491,13 @@ class FunctionExtractor:
     
     def _extract_go_functions(self, content: str, file_path: str) -> List[Dict[str, Any]]:
         """Extract functions from Go code."""
-        functions = []
+        # Without a func keyword the function pattern cannot match, so skip the regex work
+        if 'func' not in content:
+            return []
         
-        # Function pattern
-        func_pattern = r'func\s+(\w+)\s*\(([^)]*)\)\s*(?:\([^)]*\))?\s*{'
+        functions = []
         
-        matches = re.finditer(func_pattern, content)
+        matches = _GO_FUNCTION_PATTERN.finditer(content)
         for match in matches:
             func_name = match.group(1)
             params = match.group(2)
@@ -342,8 +507,8 @@ class FunctionExtractor:
             end_pos = self._find_closing_brace(content, match.end())
             
             # Get line numbers
-            start_line = content[:start_pos].count('\n') + 1
-            end_line = content[:end_pos].count('\n') + 1
+            start_line = content.count('\n', 0, start_pos) + 1
+            end_line = content.count('\n', 0, end_pos) + 1
             
             functions.append({
                 "name": func_name,
@@ -358,12 +523,13 @@ class FunctionExtractor:
     
     def _extract_rust_functions(self, content: str, file_path: str) -> List[Dict[str, Any]]:
         """Extract functions from Rust code."""
-        functions = []
+        # Without an fn keyword the function pattern cannot match, so skip the regex work
+        if 'fn' not in content:
+            return []
         
-        # Function pattern
-        func_pattern = r'(?:pub\s+)?fn\s+(\w+)\s*(?:<[^>]*>)?\s*\(([^)]*)\)(?:\s*->\s*[^{]*)?'
+        functions = []
         
-        matches = re.finditer(func_pattern, content)
+        matches = _RUST_FUNCTION_PATTERN.finditer(content)
         for match in matches:
             func_name = match.group(1)
             params = match.group(2)
@@ -381,8 +547,8 @@ class FunctionExtractor:
                 continue
             
             # Get line numbers
-            start_line = content[:start_pos].count('\n') + 1
-            end_line = content[:end_pos].count('\n') + 1
+            start_line = content.count('\n', 0, start_pos) + 1
+            end_line = content.count('\n', 0, end_pos) + 1
             
             functions.append({
                 "name": func_name,
@@ -400,20 +566,14 @@ class FunctionExtractor:
         Generic function extraction for unsupported languages.
         This is a fallback method that uses simple regex patterns.
         """
+        # Without an opening parenthesis none of the patterns can match, so skip the regex work
+        if '(' not in content:
+            return []
+        
         functions = []
         
-        # Generic function patterns (will catch many common forms but not all)
-        patterns = [
-            # Standard function declaration
-            r'(?:function|func|def|fn)\s+(\w+)\s*\(([^)]*)\)',
-            # Method declaration
-            r'(?:public|private|protected|static)?\s+(?:\w+\s+)*(\w+)\s*\(([^)]*)\)\s*{',
-            # Arrow function with name
-            r'(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?\([^)]*\)\s*=>'
-        ]
-        
-        for pattern in patterns:
-            matches = re.finditer(pattern, content)
+        for pattern in _matching_patterns(_GENERIC_PATTERN_DATABASE, _GENERIC_FUNCTION_PATTERNS, content):
+            matches = pattern.finditer(content)
             for match in matches:
                 func_name = match.group(1)
                 params = match.group(2) if len(match.groups()) > 1 else ""
@@ -433,8 +593,8 @@ class FunctionExtractor:
                     continue
                 
                 # Get line numbers
-                start_line = content[:start_pos].count('\n') + 1
-                end_line = content[:end_pos].count('\n') + 1
+                start_line = content.count('\n', 0, start_pos) + 1
+                end_line = content.count('\n', 0, end_pos) + 1
                 
                 functions.append({
                     "name": func_name,
@@ -459,15 +619,14 @@ class FunctionExtractor:
             int: Position of the closing brace, or -1 if not found
         """
         stack = 1  # Start with the opening brace already on the stack
-        pos = start_pos
         
-        while pos < len(content):
-            if content[pos] == '{':
+        # Jump straight between braces instead of stepping through every character
+        for brace in _BRACE_PATTERN.finditer(content, start_pos):
+            if brace.group() == '{':
                 stack += 1
-            elif content[pos] == '}':
+            else:
                 stack -= 1
                 if stack == 0:
-                    return pos + 1  # Return position after the closing brace
-            pos += 1
+                    return brace.end()  # Return position after the closing brace
         
         return -1  # Closing brace not found 
\ No newline at end of file
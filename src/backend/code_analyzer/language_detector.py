@@ -3,9 +3,10 @@ Language detector module.
 Detects programming languages of code files based on file extensions and content patterns.
 """
 
+import codecs
 import os
 import re
-from typing import Dict, Optional
+from typing import Dict, FrozenSet, Optional
 
 
 class LanguageDetector:
@@ -111,6 +112,16 @@ class LanguageDetector:
         '.crystal': 'Crystal',
     }
     
+    # Extensions of files that are never text, so they can be skipped unread
+    BINARY_EXTENSIONS: FrozenSet[str] = frozenset({
+        '.pyc', '.class', '.jar', '.so', '.o', '.a', '.lib', '.dll', '.exe', '.bin', '.wasm', '.whl',
+        '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.ico', '.tif', '.tiff', '.webp',
+        '.woff', '.woff2', '.ttf', '.eot', '.mp3', '.mp4', '.mov',
+        '.zip', '.tar', '.gz', '.bz2', '.xz', '.rar', '.7z',
+        '.pdf', '.doc', '.docx', '.ppt', '.pptx', '.xls', '.xlsx',
+        '.db', '.sqlite', '.db3',
+    })
+    
     # Mapping of patterns to languages for files without clear extensions
     PATTERN_MAP = [
         (r'^\s*<\?php', 'PHP'),
@@ -129,6 +140,41 @@ class LanguageDetector:
         (r'^\s*using\s+System;', 'C#'),
     ]
     
+    @classmethod
+    def is_binary_path(cls, file_path: str) -> bool:
+        """
+        Check whether a file's extension marks it as binary.
+        
+        Args:
+            file_path: Path to the file
+            
+        Returns:
+            bool: True if the extension is a known binary one
+        """
+        _, ext = os.path.splitext(file_path.lower())
+        return ext in cls.BINARY_EXTENSIONS
+    
+    @staticmethod
+    def looks_binary(head: bytes) -> bool:
+        """
+        Check whether the start of a file's content looks binary.
+        
+        Args:
+            head: Leading bytes of the file; only the first 8KB are inspected
+            
+        Returns:
+            bool: True if they contain a NUL byte or are not a valid UTF-8 prefix
+        """
+        head = head[:8192]
+        if b'\x00' in head:
+            return True
+        try:
+            # Not final, so a character cut off at the 8KB boundary is still valid
+            codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+        except UnicodeDecodeError:
+            return True
+        return False
+    
     @classmethod
     def detect_language(cls, file_path: str, content: Optional[str] = None) -> str:
         """
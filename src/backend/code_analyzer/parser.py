@@ -4,51 +4,185 @@ Analyzes code files to extract metadata, detect languages, and organize parsing
 """
 
 import os
+import re
 import logging
-from typing import Dict, Any, List
+from functools import lru_cache, partial
+from types import MappingProxyType
+from typing import Callable, Dict, Any, List, Pattern, Union
 
 from src.backend.code_analyzer.language_detector import LanguageDetector
 from src.backend.code_analyzer.function_extractor import FunctionExtractor
 
+# Different comment styles by language
+_DOC_PATTERNS = MappingProxyType({
+    "Python": {
+        "single": "#",
+        "multi_start": '"""',
+        "multi_end": '"""',
+        "alternate_multi_start": "'''",
+        "alternate_multi_end": "'''"
+    },
+    "JavaScript": {
+        "single": "//",
+        "multi_start": "/*",
+        "multi_end": "*/",
+        "jsdoc_start": "/**",
+        "jsdoc_end": "*/"
+    },
+    "TypeScript": {
+        "single": "//",
+        "multi_start": "/*",
+        "multi_end": "*/",
+        "jsdoc_start": "/**",
+        "jsdoc_end": "*/"
+    },
+    "Java": {
+        "single": "//",
+        "multi_start": "/*",
+        "multi_end": "*/",
+        "javadoc_start": "/**",
+        "javadoc_end": "*/"
+    },
+    "C": {
+        "single": "//",
+        "multi_start": "/*",
+        "multi_end": "*/"
+    },
+    "C++": {
+        "single": "//",
+        "multi_start": "/*",
+        "multi_end": "*/"
+    },
+    "Ruby": {
+        "single": "#",
+        "multi_start": "=begin",
+        "multi_end": "=end"
+    },
+    "Go": {
+        "single": "//",
+        "multi_start": "/*",
+        "multi_end": "*/"
+    }
+})
+
+
+@lru_cache(maxsize=None)
+def _compile_doc_regex(language: str) -> Pattern:
+    """
+    Compile the comment pattern for a language.
+    
+    Multi-line comments must open at the start of a line and close at the
+    first end marker; single-line comments take the rest of their line.
+    
+    Args:
+        language: Programming language
+        
+    Returns:
+        Pattern: Compiled comment pattern
+    """
+    # Default to C-style comments
+    lang_patterns = _DOC_PATTERNS.get(language, {
+        "single": "//",
+        "multi_start": "/*",
+        "multi_end": "*/"
+    })
+    
+    starts = [lang_patterns.get(key) for key in ("multi_start", "jsdoc_start", "alternate_multi_start")]
+    ends = [lang_patterns.get(key) for key in ("multi_end", "jsdoc_end", "alternate_multi_end")]
+    return re.compile(
+        r'^[^\S\n]*(?:'
+        r'(?P<multi>' + "|".join(re.escape(token) for token in starts if token) + r')'
+        r'(?P<multi_text>.*?)(?:(?P<multi_end>' + "|".join(re.escape(token) for token in ends if token) + r')|\Z)'
+        r'|' + re.escape(lang_patterns["single"]) + r'(?P<single_text>[^\n]*))',
+        re.MULTILINE | re.DOTALL
+    )
+
+
+def _read_file(path: str) -> bytes:
+    """
+    Read a file's raw bytes from disk.
+    
+    Args:
+        path: Path to the file on disk
+        
+    Returns:
+        bytes: File content
+    """
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _loaded_content(content: Union[str, bytes]) -> bytes:
+    """
+    Return content that is already in memory as UTF-8 bytes, as a loader for parse_file.
+    
+    Args:
+        content: File content
+        
+    Returns:
+        bytes: File content
+    """
+    return content.encode('utf-8') if isinstance(content, str) else content
+
 
 class CodeParser:
     """Parser for code files."""
     
+    # Number of leading characters kept with parsed files for prompts
+    PREVIEW_CHARS = 10000
+    
     def __init__(self):
         """Initialize the code parser."""
         self.logger = logging.getLogger(__name__)
         self.language_detector = LanguageDetector()
         self.function_extractor = FunctionExtractor()
     
-    def parse_file(self, file_path: str, content: str) -> Dict[str, Any]:
+    def parse_file(self, file_path: str, content: Union[str, Callable[[], bytes]]) -> Dict[str, Any]:
         """
         Parse a single file to extract metadata and functions.
         
+        Content given as a string is kept under "content", as before. Content
+        given as a loader is only held while parsing; the parsed data keeps a
+        short "preview" of it for prompts, and the loader under "_loader" so
+        the full content can be read again when it is needed.
+        
         Args:
             file_path: Path to the file
-            content: Content of the file
+            content: Content of the file, or a callable returning its raw UTF-8 bytes
             
         Returns:
-            dict: Parsed file data
+            dict: Parsed file data, with an "error" entry if the file could not be read or parsed
         """
+        if isinstance(content, str):
+            kept = {"content": content}
+        else:
+            kept = {"preview": "", "_loader": content}
+        line_count = size_bytes = 0
+        
         try:
+            # Calculate file metrics directly on the raw bytes, encoding string
+            # content once; loaded bytes are decoded once for the steps below
+            raw_content = content.encode('utf-8') if isinstance(content, str) else content()
+            line_count = raw_content.count(b'\n') + 1
+            size_bytes = len(raw_content)
+            if not isinstance(content, str):
+                content = raw_content.decode('utf-8', errors='ignore')
+                kept["preview"] = content[:self.PREVIEW_CHARS]  # Enough content for summarization later
+            del raw_content
+            
             # Detect language
             language = self.language_detector.detect_language(file_path, content)
             
             # Extract functions
             functions = self.function_extractor.extract_functions(content, language, file_path)
             
-            # Calculate file metrics
-            line_count = content.count('\n') + 1
-            size_bytes = len(content.encode('utf-8'))
-            
             return {
                 "path": file_path,
                 "language": language,
                 "functions": functions,
                 "size_bytes": size_bytes,
                 "line_count": line_count,
-                "content": content  # Keep content for summarization later
+                **kept
             }
         except Exception as e:
             self.logger.error("Error parsing file %s: %s", file_path, str(e))
@@ -56,9 +190,9 @@ class CodeParser:
                 "path": file_path,
                 "language": "Unknown",
                 "functions": [],
-                "size_bytes": len(content.encode('utf-8')),
-                "line_count": content.count('\n') + 1,
-                "content": content,
+                "size_bytes": size_bytes,
+                "line_count": line_count,
+                **kept,
                 "error": str(e)
             }
     
@@ -67,7 +201,8 @@ class CodeParser:
         Parse all files in a repository.
         
         Args:
-            repo_files: Dictionary mapping file paths to file contents and metadata
+            repo_files: Dictionary mapping file paths to file metadata and either
+                their "content" or the "full_path" to read it from on demand
             
         Returns:
             list: List of parsed file data
@@ -75,12 +210,15 @@ class CodeParser:
         parsed_files = []
         
         for file_path, file_data in repo_files.items():
-            # Skip files without content
-            if "content" not in file_data:
+            if "content" in file_data:
+                content_loader = partial(_loaded_content, file_data["content"])
+            elif "full_path" in file_data:
+                content_loader = partial(_read_file, file_data["full_path"])
+            else:
+                # Skip files without content
                 continue
             
-            parsed_file = self.parse_file(file_path, file_data["content"])
-            parsed_files.append(parsed_file)
+            parsed_files.append(self.parse_file(file_path, content_loader))
         
         return parsed_files
         
@@ -96,131 +234,40 @@ class CodeParser:
             list: Extracted documentation
         """
         documentation = []
+        pattern = _compile_doc_regex(language)
         
-        # Different comment styles by language
-        doc_patterns = {
-            "Python": {
-                "single": "#",
-                "multi_start": '"""',
-                "multi_end": '"""',
-                "alternate_multi_start": "'''",
-                "alternate_multi_end": "'''"
-            },
-            "JavaScript": {
-                "single": "//",
-                "multi_start": "/*",
-                "multi_end": "*/",
-                "jsdoc_start": "/**",
-                "jsdoc_end": "*/"
-            },
-            "TypeScript": {
-                "single": "//",
-                "multi_start": "/*",
-                "multi_end": "*/",
-                "jsdoc_start": "/**",
-                "jsdoc_end": "*/"
-            },
-            "Java": {
-                "single": "//",
-                "multi_start": "/*",
-                "multi_end": "*/",
-                "javadoc_start": "/**",
-                "javadoc_end": "*/"
-            },
-            "C": {
-                "single": "//",
-                "multi_start": "/*",
-                "multi_end": "*/"
-            },
-            "C++": {
-                "single": "//",
-                "multi_start": "/*",
-                "multi_end": "*/"
-            },
-            "Ruby": {
-                "single": "#",
-                "multi_start": "=begin",
-                "multi_end": "=end"
-            },
-            "Go": {
-                "single": "//",
-                "multi_start": "/*",
-                "multi_end": "*/"
-            }
-        }
-        
-        # Default to C-style comments
-        lang_patterns = doc_patterns.get(language, {
-            "single": "//",
-            "multi_start": "/*",
-            "multi_end": "*/"
-        })
-        
-        # Simple logic to extract multi-line comments
-        lines = content.split('\n')
-        in_multi_comment = False
-        current_comment = ""
-        
-        for i, line in enumerate(lines):
-            line_content = line.strip()
-            
-            # Check for multi-line comment start
-            if not in_multi_comment:
-                for start_pattern in [lang_patterns.get("multi_start"), 
-                                     lang_patterns.get("jsdoc_start"),
-                                     lang_patterns.get("alternate_multi_start")]:
-                    if start_pattern and line_content.startswith(start_pattern):
-                        in_multi_comment = True
-                        current_comment = line_content[len(start_pattern):].strip()
-                        if current_comment and any(end_pattern in current_comment for end_pattern in 
-                                                 [lang_patterns.get("multi_end"), 
-                                                  lang_patterns.get("jsdoc_end"),
-                                                  lang_patterns.get("alternate_multi_end")] if end_pattern):
-                            # Comment starts and ends on the same line
-                            for end_pattern in [lang_patterns.get("multi_end"), 
-                                               lang_patterns.get("jsdoc_end"),
-                                               lang_patterns.get("alternate_multi_end")]:
-                                if end_pattern and end_pattern in current_comment:
-                                    current_comment = current_comment[:current_comment.find(end_pattern)].strip()
-                                    break
-                            if current_comment:
-                                documentation.append({
-                                    "type": "multi",
-                                    "content": current_comment,
-                                    "line": i + 1
-                                })
-                            in_multi_comment = False
-                            current_comment = ""
-                        break
-            # Check for multi-line comment end
-            elif in_multi_comment:
-                for end_pattern in [lang_patterns.get("multi_end"), 
-                                   lang_patterns.get("jsdoc_end"),
-                                   lang_patterns.get("alternate_multi_end")]:
-                    if end_pattern and end_pattern in line_content:
-                        current_comment += " " + line_content[:line_content.find(end_pattern)].strip()
-                        documentation.append({
-                            "type": "multi",
-                            "content": current_comment,
-                            "line": i + 1
-                        })
-                        in_multi_comment = False
-                        current_comment = ""
-                        break
-                if in_multi_comment:
-                    # Still in multi-line comment
-                    current_comment += " " + line_content
+        # Scan the whole file once, counting newlines only between matches
+        line = 1
+        position = 0
+        for match in pattern.finditer(content):
+            if match.group("multi") is not None:
+                if match.group("multi_end") is None:
+                    # Unterminated multi-line comment runs to the end of the file
+                    break
+                
+                comment_type = "multi"
+                parts = match.group("multi_text").split('\n')
+                comment_text = " ".join(part.strip() for part in parts)
+                if len(parts) == 1 and not comment_text:
+                    continue
+                
+                # Multi-line comments are reported on the line where they end
+                match_pos = match.end("multi_text")
+            else:
+                comment_type = "single"
+                comment_text = match.group("single_text").strip()
+                if not comment_text:
+                    continue
+                
+                match_pos = match.start()
             
-            # Check for single-line comments
-            single_comment = lang_patterns.get("single")
-            if single_comment and not in_multi_comment and line_content.startswith(single_comment):
-                comment_text = line_content[len(single_comment):].strip()
-                if comment_text:
-                    documentation.append({
-                        "type": "single",
-                        "content": comment_text,
-                        "line": i + 1
-                    })
+            line += content.count('\n', position, match_pos)
+            position = match_pos
+            documentation.append({
+                "type": comment_type,
+                "content": comment_text,
+                "line": line
+            })
         
         return documentation 
 
@@ -236,4 +283,4 @@ class CodeParser:
         Returns:
             list: Extracted functions
         """
-        return self.function_extractor.extract_functions(content, language, file_path) 
\ No newline at end of file
+        return self.function_extractor.extract_functions(content, language, file_path)
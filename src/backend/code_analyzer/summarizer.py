@@ -3,25 +3,78 @@ Summarizer module.
 Generates summaries for code files and repositories using LLM.
 """
 
+import hashlib
+import heapq
 import logging
+from collections import Counter
 from typing import Dict, Any, List, Optional
 
 from src.agents.llm_client import LLMClient
 
+try:
+    # pyahocorasick finds every important name in a path with a single pass
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Files with these extensions are never picked as important
+_SKIPPED_EXTENSIONS = (".md", ".txt", ".json", ".yml", ".yaml", ".toml", ".ini")
+
+# Path fragments that mark a file as likely to hold core logic
+_IMPORTANT_NAMES = ("main", "index", "app", "server", "client", "core", "util", "base")
+
+
+def _build_name_automaton(names: tuple) -> Optional[Any]:
+    """
+    Build an Aho-Corasick automaton that matches any of the given names.
+    
+    Args:
+        names: Names to match
+        
+    Returns:
+        Automaton: Automaton whose values are the matched names, or None if
+            pyahocorasick is unavailable
+    """
+    if ahocorasick is None:
+        return None
+    
+    automaton = ahocorasick.Automaton()
+    for name in names:
+        automaton.add_word(name, name)
+    automaton.make_automaton()
+    return automaton
+
+
+_IMPORTANT_NAME_AUTOMATON = _build_name_automaton(_IMPORTANT_NAMES)
+
+
+def _prompt_cache_key(prompt: str) -> str:
+    """
+    Hash a summary prompt into a cache key.
+    
+    Args:
+        prompt: Prompt text
+        
+    Returns:
+        str: Hex digest of the prompt
+    """
+    return hashlib.blake2b(prompt.encode('utf-8'), digest_size=16).hexdigest()
+
 
 class CodeSummarizer:
     """Summarizes code files and repositories."""
     
-    def __init__(self, db_client=None):
+    def __init__(self, db_client=None, llm_client: Optional[LLMClient] = None):
         """
         Initialize the code summarizer.
         
         Args:
             db_client: Optional database client
+            llm_client: Optional LLM client to share; a new one is created otherwise
         """
         self.db_client = db_client
         self.logger = logging.getLogger(__name__)
-        self.llm_client = LLMClient()
+        self.llm_client = llm_client or LLMClient()
         
         # Templates for LLM prompts
         self.file_summary_template = """
@@ -81,29 +134,107 @@ class CodeSummarizer:
             str: Summary text
         """
         try:
-            # Prepare prompt for LLM
-            prompt = f"""
-            Summarize the following {language} code file:
-            
-            File path: {file_path}
+            prompt = self._build_file_prompt(file_path, content, language, functions)
             
-            ```{language}
-            {content[:4000]}  # Truncate long files
-            ```
-            
-            {"Functions: " + ", ".join([f.get('name', '') for f in (functions or [])]) if functions else ""}
-            
-            Please provide a concise summary of what this file does and its main components.
-            Focus on the overall purpose, key functions/classes, and how it might fit into a larger codebase.
-            """
+            # Identical prompts produce interchangeable summaries, so reuse a
+            # stored one when the file has not changed since it was generated
+            cache_key = _prompt_cache_key(prompt)
+            cached_summary = self._get_cached_summary(cache_key)
+            if cached_summary is not None:
+                return cached_summary
             
             response = self.llm_client.generate_text(prompt, max_tokens=500)
-            return response.strip()
+            return self._finish_summary(cache_key, response)
             
         except Exception as e:
             self.logger.error(f"Error summarizing file {file_path}: {str(e)}")
             return f"Error: {str(e)}"
     
+    def _build_file_prompt(self, file_path: str, content: str, language: str, 
+                           functions: List[Dict] = None) -> str:
+        """
+        Build the LLM prompt used to summarize a code file.
+        
+        Args:
+            file_path: Path to the file
+            content: File content
+            language: Programming language
+            functions: Optional list of functions in the file
+            
+        Returns:
+            str: Prompt text
+        """
+        return f"""
+        Summarize the following {language} code file:
+        
+        File path: {file_path}
+        
+        ```{language}
+        {content[:4000]}  # Truncate long files
+        ```
+        
+        {"Functions: " + ", ".join([f.get('name', '') for f in (functions or [])]) if functions else ""}
+        
+        Please provide a concise summary of what this file does and its main components.
+        Focus on the overall purpose, key functions/classes, and how it might fit into a larger codebase.
+        """
+    
+    def _finish_summary(self, cache_key: str, response: str) -> str:
+        """
+        Clean up an LLM response and store it as a file summary.
+        
+        Args:
+            cache_key: Hash of the summary prompt
+            response: Raw LLM response
+            
+        Returns:
+            str: Summary text
+        """
+        summary = response.strip()
+        
+        # Do not keep the client's error and empty-response placeholders
+        if summary and summary != "No response generated" and not summary.startswith("Error"):
+            self._cache_summary(cache_key, summary)
+        
+        return summary
+    
+    def _get_cached_summary(self, cache_key: str) -> Optional[str]:
+        """
+        Look up a stored file summary.
+        
+        Args:
+            cache_key: Hash of the summary prompt
+            
+        Returns:
+            str: Stored summary, or None if there is none
+        """
+        if self.db_client is None:
+            return None
+        
+        try:
+            cached = self.db_client.db.file_summaries.find_one({"_id": cache_key}, {"summary": 1})
+        except Exception as e:
+            self.logger.warning(f"Error reading cached file summary: {str(e)}")
+            return None
+        
+        return cached.get("summary") if cached else None
+    
+    def _cache_summary(self, cache_key: str, summary: str) -> None:
+        """
+        Store a file summary for later runs.
+        
+        Args:
+            cache_key: Hash of the summary prompt
+            summary: Summary text
+        """
+        if self.db_client is None:
+            return
+        
+        try:
+            self.db_client.db.file_summaries.replace_one({"_id": cache_key}, {"summary": summary}, upsert=True)
+        except Exception as e:
+            self.logger.warning(f"Error caching file summary: {str(e)}")
+    
     def summarize_repository(self, parsed_files: List[Dict[str, Any]], repo_name: str = "Unknown Repository") -> str:
         """
         Generate a summary for an entire repository.
@@ -116,41 +247,45 @@ class CodeSummarizer:
             str: Repository summary
         """
         try:
-            # Count file types
-            language_counts = {}
-            for file in parsed_files:
-                lang = file.get("language", "Unknown")
-                language_counts[lang] = language_counts.get(lang, 0) + 1
-            
-            # Sort languages by count
-            sorted_languages = sorted(language_counts.items(), key=lambda x: x[1], reverse=True)
-            languages_str = "\n".join([f"- {lang}: {count} files" for lang, count in sorted_languages[:5]])
+            # Count file types and take the most used languages
+            language_counts = Counter(file.get("language", "Unknown") for file in parsed_files)
+            languages_str = "\n".join([f"- {lang}: {count} files" for lang, count in language_counts.most_common(5)])
             
-            # Get directories
-            directories = {}
+            # Count files per top-level directory
+            directories = Counter()
             for file in parsed_files:
-                path = file.get("path", "")
-                parts = path.split("/")
-                if len(parts) > 1:
-                    dir_name = parts[0]
-                    directories[dir_name] = directories.get(dir_name, 0) + 1
+                head, sep, _ = file.get("path", "").partition("/")
+                if sep:
+                    directories[head] += 1
             
-            # Sort directories by file count
-            sorted_dirs = sorted(directories.items(), key=lambda x: x[1], reverse=True)
-            directories_str = "\n".join([f"- {dir_name}: {count} files" for dir_name, count in sorted_dirs[:5]])
+            # Take the directories with the most files
+            directories_str = "\n".join([f"- {dir_name}: {count} files" for dir_name, count in directories.most_common(5)])
             
             # Get summaries for important files
             important_files = self._select_important_files(parsed_files)
-            file_summaries = []
             
-            for file in important_files:
-                # If the file already has a summary, use it, otherwise generate one
-                if "summary" in file and file["summary"]:
-                    summary = file["summary"]
-                else:
-                    summary = self.summarize_file(file["path"], file.get("content", ""), file.get("language", "Unknown"), file.get("functions", []))
+            # Answer what the summary cache can, then send the remaining
+            # prompts as one batch so they are all in flight together
+            summaries = [file.get("summary") for file in important_files]
+            pending = []
+            for i, file in enumerate(important_files):
+                if summaries[i]:
+                    continue
                 
-                file_summaries.append(f"- {file['path']}: {summary}")
+                prompt = self._build_file_prompt(file["path"], self._load_content(file), file.get("language", "Unknown"), file.get("functions", []))
+                cache_key = _prompt_cache_key(prompt)
+                cached_summary = self._get_cached_summary(cache_key)
+                if cached_summary is not None:
+                    summaries[i] = cached_summary
+                else:
+                    pending.append((i, prompt, cache_key))
+            
+            if pending:
+                responses = self.llm_client.generate_texts([prompt for _, prompt, _ in pending], max_tokens=500)
+                for (i, _, cache_key), response in zip(pending, responses):
+                    summaries[i] = self._finish_summary(cache_key, response)
+            
+            file_summaries = [f"- {file['path']}: {summary}" for file, summary in zip(important_files, summaries)]
             
             # Format file summaries as string
             file_summaries_str = "\n".join(file_summaries)
@@ -187,12 +322,13 @@ class CodeSummarizer:
         scored_files = []
         for file in parsed_files:
             path = file.get("path", "")
+            lower_path = path.lower()
             
             # Skip certain files
-            if (path.endswith((".md", ".txt", ".json", ".yml", ".yaml", ".toml", ".ini")) or
-                "test" in path.lower() or
-                "vendor" in path.lower() or
-                "node_modules" in path.lower()):
+            if (path.endswith(_SKIPPED_EXTENSIONS) or
+                "test" in lower_path or
+                "vendor" in lower_path or
+                "node_modules" in lower_path):
                 continue
             
             # Score based on number of functions
@@ -202,19 +338,35 @@ class CodeSummarizer:
             size_score = min(file.get("size_bytes", 0) / 1000, 5)  # Cap at 5
             
             # Score based on file name importance
-            name_score = 0
-            important_names = ["main", "index", "app", "server", "client", "core", "util", "base"]
-            for name in important_names:
-                if name in path.lower():
-                    name_score += 2
+            if _IMPORTANT_NAME_AUTOMATON is not None:
+                name_score = 2 * len({name for _, name in _IMPORTANT_NAME_AUTOMATON.iter(lower_path)})
+            else:
+                name_score = 2 * sum(1 for name in _IMPORTANT_NAMES if name in lower_path)
             
             # Calculate total score
             total_score = function_score + size_score + name_score
             
             scored_files.append((file, total_score))
         
-        # Sort files by score and take top N
-        sorted_files = sorted(scored_files, key=lambda x: x[1], reverse=True)
-        important_files = [file for file, _ in sorted_files[:max_files]]
+        # Take the top N files by score
+        sorted_files = heapq.nlargest(max_files, scored_files, key=lambda x: x[1])
+        important_files = [file for file, _ in sorted_files]
+        
+        return important_files
+    
+    def _load_content(self, file: Dict[str, Any]) -> str:
+        """
+        Get the content of a parsed file for a prompt, preferring its preview.
         
-        return important_files 
\ No newline at end of file
+        Args:
+            file: Parsed file data
+            
+        Returns:
+            str: File content
+        """
+        if "preview" in file:
+            return file["preview"]
+        if "_loader" in file:
+            # Loaders return raw bytes; decode only for the prompt
+            return file["_loader"]().decode('utf-8', errors='ignore')
+        return file.get("content", "")
@@ -1,39 +1,274 @@
+import importlib.util
 import logging
-from typing import Dict, List, Any, Optional
-from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple, Union
+from datetime import datetime, timezone
 from bson import ObjectId
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
 import pymongo
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, ServerSelectionTimeoutError
+from pydantic import TypeAdapter
 
 from config import MONGODB_URI, MONGODB_DB
+from src.backend.database.cache import query_history_cache, repository_cache, repository_list_cache
+from src.backend.models.repository import Repository
+
+# Leaves out file bodies and function code from metadata-only file reads
+FILE_META_PROJECTION = {"content": 0, "functions.code": 0}
+
+# Index behind per-repository query history, newest first
+QUERY_HISTORY_INDEX = [("repo_id", 1), ("timestamp", -1)]
+
+# Server error code for a unique index violation
+DUPLICATE_KEY_ERROR = 11000
+
+# Validators built once and reused for every repository document
+_REPO_ADAPTER = TypeAdapter(Repository)
+_REPO_LIST_ADAPTER = TypeAdapter(List[Repository])
+
+# (uri, db_name) pairs whose indexes were already ensured by this process
+_indexed_databases = set()
+
+
+@lru_cache(maxsize=4096)
+def _parse_object_id(value: Union[str, bytes]) -> Optional[ObjectId]:
+    """Parse an ObjectId once per distinct string; None if it is not valid."""
+    return ObjectId(value) if ObjectId.is_valid(value) else None
+
+
+def _available_compressors() -> str:
+    """List wire compressors in order of preference, skipping those whose package is missing."""
+    optional = (("zstd", "zstandard"), ("snappy", "snappy"))
+    compressors = [name for name, module in optional if importlib.util.find_spec(module)]
+    # zlib ships with Python, so there is always a fallback
+    compressors.append("zlib")
+    return ",".join(compressors)
+
+
+# Wire compression offered to the server; file contents shrink several-fold
+MONGO_COMPRESSORS = _available_compressors()
+
+
+@lru_cache(maxsize=4)
+def get_mongo_client(uri: str, timeout_ms: int) -> MongoClient:
+    """
+    Get the process-wide MongoClient for a URI and timeout, connecting on first use.
+    
+    Args:
+        uri: MongoDB URI
+        timeout_ms: Server selection timeout in milliseconds
+        
+    Returns:
+        MongoClient: Shared client whose connection pool serves every caller
+    """
+    client = MongoClient(
+        uri,
+        serverSelectionTimeoutMS=timeout_ms,
+        compressors=MONGO_COMPRESSORS,
+        maxPoolSize=64,
+        minPoolSize=4,
+        maxIdleTimeMS=300000,
+        retryWrites=True,
+        w=1
+    )
+    # Verify the connection once; a failure raises and is not cached
+    client.admin.command('ping')
+    return client
+
+
+def file_name_key(path: str) -> str:
+    """
+    Get the lookup key stored as name_lc for a file path.
+    
+    Args:
+        path: Repository-relative file path
+        
+    Returns:
+        str: Lowercased base name of the path
+    """
+    return path.rsplit("/", 1)[-1].lower()
+
+
+def to_object_id(value: Any) -> Optional[ObjectId]:
+    """
+    Convert a repository or document ID to an ObjectId.
+    
+    Args:
+        value: ObjectId, or its string form
+        
+    Returns:
+        ObjectId: Parsed ObjectId, or None if value is not a valid ObjectId
+    """
+    if isinstance(value, ObjectId):
+        return value
+    if isinstance(value, (str, bytes)):
+        return _parse_object_id(value)
+    return None
+
+
+def id_candidates(value: Any) -> List[Any]:
+    """
+    List the forms an ID may be stored under, for use with $in.
+    
+    Args:
+        value: ID as given by the caller
+        
+    Returns:
+        list: The ID itself, followed by its ObjectId form when that differs
+    """
+    object_id = to_object_id(value)
+    if object_id is None or object_id == value:
+        return [value]
+    return [value, object_id]
+
+
+class WriteBatch:
+    """Buffers file writes for one repository and saves them in bulk."""
+    
+    def __init__(self, db_client: "DBClient", repository_id: str, 
+                 first_ingest: bool = False, flush_size: int = 500):
+        """
+        Initialize the batch.
+        
+        Args:
+            db_client: Client the buffered files are saved through
+            repository_id: Repository the files belong to
+            first_ingest: Whether the repository has no stored files yet
+            flush_size: Number of buffered files that triggers a flush
+        """
+        self.db_client = db_client
+        self.repository_id = to_object_id(repository_id) or repository_id
+        self.first_ingest = first_ingest
+        self.flush_size = flush_size
+        self.failed_files = 0
+        self._files = []
+    
+    def __enter__(self) -> "WriteBatch":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.flush()
+        # Surface failed flushes, unless an exception is already propagating
+        if exc_type is None and self.failed_files:
+            raise RuntimeError(f"Failed to save {self.failed_files} files for repository {self.repository_id}")
+    
+    def save_file(self, file_path: str, language: str, content: str, 
+                  functions: List[Dict], documentation: List[Dict], 
+                  summary: str = "") -> None:
+        """
+        Buffer a file, flushing once the batch is full.
+        
+        Args:
+            file_path: File path
+            language: Programming language
+            content: File content
+            functions: Extracted functions
+            documentation: Extracted documentation
+            summary: File summary
+        """
+        self.add_files([{
+            "path": file_path,
+            "language": language,
+            "content": content,
+            "functions": functions,
+            "documentation": documentation,
+            "summary": summary
+        }])
+    
+    def add_files(self, files: List[Dict[str, Any]]) -> None:
+        """
+        Buffer processed files, flushing once the batch is full.
+        
+        Args:
+            files: Processed files in the form accepted by DBClient.save_files
+        """
+        self._files.extend(files)
+        if len(self._files) >= self.flush_size:
+            self.flush()
+    
+    def flush(self) -> bool:
+        """
+        Save every buffered file in one bulk write.
+        
+        Failures are counted in failed_files, and raised when the batch exits.
+        
+        Returns:
+            bool: True if successful or nothing was buffered, False otherwise
+        """
+        if not self._files:
+            return True
+        
+        files, self._files = self._files, []
+        saved = self.db_client.save_files(self.repository_id, files, first_ingest=self.first_ingest)
+        if not saved:
+            self.failed_files += len(files)
+        return saved
 
 
 class DBClient:
     """Database client for MongoDB interactions."""
     
-    def __init__(self, uri: str = None, db_name: str = None):
+    def __init__(self, uri: str = None, db_name: str = None, timeout_ms: int = 5000):
         """
         Initialize the database client.
         
         Args:
             uri: MongoDB URI (defaults to config)
             db_name: Database name (defaults to config)
+            timeout_ms: Server selection timeout in milliseconds
         """
         self.logger = logging.getLogger(__name__)
         self.uri = uri or MONGODB_URI
         self.db_name = db_name or MONGODB_DB
+        self.timeout_ms = timeout_ms
         
         try:
-            self.client = MongoClient(self.uri, serverSelectionTimeoutMS=5000)
+            # Share one connection pool across every client in the process
+            self.client = get_mongo_client(self.uri, self.timeout_ms)
             self.db = self.client[self.db_name]
-            
-            # Check connection
-            self.client.admin.command('ping')
+            self.raw_db = self.db.with_options(codec_options=CodecOptions(document_class=RawBSONDocument))
             self.logger.info(f"Connected to MongoDB at {self.uri}")
         except (ConnectionFailure, ServerSelectionTimeoutError) as e:
             self.logger.error(f"Failed to connect to MongoDB: {str(e)}")
             raise
+        
+        self._ensure_indexes()
+    
+    def close(self) -> None:
+        """Release this client's references; the shared MongoClient stays open for other callers."""
+        self.client = None
+        self.db = None
+        self.raw_db = None
+    
+    def _ensure_indexes(self) -> None:
+        """Create the indexes behind the common lookups, once per database and process."""
+        database_key = (self.uri, self.db_name)
+        if database_key in _indexed_databases:
+            return
+        
+        try:
+            self.db.files.create_index([("repo_id", 1), ("path", 1)], unique=True)
+            self.db.files.create_index([("repo_id", 1), ("name_lc", 1)])
+            self.db.functions.create_index([("repo_id", 1), ("file_path", 1)])
+            self.db.queries.create_index(QUERY_HISTORY_INDEX)
+            self.db.repositories.create_index([("created_at", -1)])
+            # Text indexes behind query keyword search; repo_id is a prefix
+            # because every search is scoped to one repository
+            self.db.files.create_index(
+                [("repo_id", 1), ("path", "text"), ("summary", "text"), ("content", "text")],
+                weights={"path": 10, "summary": 5, "content": 1},
+                name="files_text"
+            )
+            self.db.functions.create_index(
+                [("repo_id", 1), ("name", "text"), ("description", "text")],
+                weights={"name": 10, "description": 5},
+                name="functions_text"
+            )
+            _indexed_databases.add(database_key)
+        except Exception as e:
+            self.logger.warning(f"Failed to create indexes: {str(e)}")
     
     def get_repository(self, repo_id: str) -> Optional[Dict]:
         """
@@ -45,16 +280,16 @@ class DBClient:
         Returns:
             dict: Repository data or None if not found
         """
+        cache_key = (self.uri, self.db_name, str(repo_id))
+        cached = repository_cache.get(cache_key)
+        if cached is not None:
+            # Build a fresh model so callers never share cached state
+            return _REPO_ADAPTER.validate_python(cached)
+        
         try:
-            # Try different ways to find the repository
-            repo = None
-            
-            # Try with the original ID first
-            repo = self.db.repositories.find_one({"_id": repo_id})
-            
-            # If not found and ID is a valid ObjectId, try with ObjectId
-            if not repo and ObjectId.is_valid(repo_id):
-                repo = self.db.repositories.find_one({"_id": ObjectId(repo_id)})
+            # Match the ID as stored and, if it is a valid ObjectId, in its
+            # ObjectId form, in a single round trip
+            repo = self.db.repositories.find_one({"_id": {"$in": id_candidates(repo_id)}})
             
             if repo:
                 # Convert ObjectId to string for serialization
@@ -65,9 +300,10 @@ class DBClient:
                 if "created_at" in repo and isinstance(repo["created_at"], datetime):
                     repo["created_at"] = repo["created_at"].isoformat()
             
+                repository_cache.set(cache_key, repo)
+                
                 # Convert repository data to Repository object
-                from src.backend.models.repository import Repository
-                return Repository(**repo)
+                return _REPO_ADAPTER.validate_python(repo)
                 
             self.logger.warning(f"Repository not found: {repo_id}")
             return None
@@ -76,6 +312,44 @@ class DBClient:
             self.logger.error(f"Error getting repository {repo_id}: {str(e)}")
             return None
     
+    def get_repository_raw(self, repo_id: str) -> Optional[RawBSONDocument]:
+        """
+        Get a repository document without decoding it.
+        
+        Fields are decoded only when accessed, so existence checks and
+        pass-through reads skip building Python objects for the whole document.
+        
+        Args:
+            repo_id: Repository ID
+            
+        Returns:
+            RawBSONDocument: Repository document or None if not found
+        """
+        return self.raw_db.repositories.find_one({"_id": {"$in": id_candidates(repo_id)}})
+    
+    def list_repositories(self) -> List[Repository]:
+        """
+        List all repositories as Repository objects.
+        
+        Returns:
+            list: Repositories, newest first, empty on error
+        """
+        try:
+            repos = list(self.db.repositories.find().sort("created_at", -1))
+            
+            for repo in repos:
+                if isinstance(repo.get("_id"), ObjectId):
+                    repo["_id"] = str(repo["_id"])
+                if isinstance(repo.get("created_at"), datetime):
+                    repo["created_at"] = repo["created_at"].isoformat()
+            
+            # Validate the whole list in one call
+            return _REPO_LIST_ADAPTER.validate_python(repos)
+            
+        except Exception as e:
+            self.logger.error(f"Error listing repositories: {str(e)}")
+            return []
+    
     def save_repository(self, repository) -> str:
         """
         Save a repository to the database.
@@ -87,12 +361,12 @@ class DBClient:
             str: Repository ID
         """
         try:
-            # Convert to dict
-            repo_dict = repository.dict(by_alias=True)
-            
-            # Remove ID if None
-            if "_id" in repo_dict and repo_dict["_id"] is None:
-                del repo_dict["_id"]
+            # Convert to dict in one pass, leaving out an unset ID so
+            # MongoDB generates one
+            repo_dict = repository.model_dump(
+                by_alias=True,
+                exclude={"id"} if repository.id is None else None
+            )
             
             # Insert into database
             result = self.db.repositories.insert_one(repo_dict)
@@ -115,16 +389,17 @@ class DBClient:
         Returns:
             bool: True if successful, False otherwise
         """
+        cache_key = (self.uri, self.db_name, str(repo_id))
         try:
             # Convert string ID to ObjectId if needed
-            if not isinstance(repo_id, ObjectId) and ObjectId.is_valid(repo_id):
-                repo_id = ObjectId(repo_id)
+            repo_id = to_object_id(repo_id) or repo_id
                 
-            # Update status
+            # Update status; the server skips the write when it is already set
             self.db.repositories.update_one(
-                {"_id": repo_id},
+                {"_id": repo_id, "status": {"$ne": status}},
                 {"$set": {"status": status}}
             )
+            repository_cache.pop(cache_key)
             
             return True
             
@@ -143,16 +418,20 @@ class DBClient:
         Returns:
             bool: True if successful, False otherwise
         """
+        if not kwargs:
+            return True
+        
+        cache_key = (self.uri, self.db_name, str(repo_id))
         try:
             # Convert string ID to ObjectId if needed
-            if not isinstance(repo_id, ObjectId) and ObjectId.is_valid(repo_id):
-                repo_id = ObjectId(repo_id)
+            repo_id = to_object_id(repo_id) or repo_id
                 
-            # Update fields
+            # Update fields; the server skips the write when all of them are already set
             self.db.repositories.update_one(
-                {"_id": repo_id},
+                {"_id": repo_id, "$or": [{name: {"$ne": value}} for name, value in kwargs.items()]},
                 {"$set": kwargs}
             )
+            repository_cache.pop(cache_key)
             
             return True
             
@@ -160,6 +439,67 @@ class DBClient:
             self.logger.error(f"Error updating repository: {str(e)}")
             return False
     
+    def delete_repository(self, repo_id: str) -> bool:
+        """
+        Delete a repository with its files, functions and query history.
+        
+        Args:
+            repo_id: Repository ID
+            
+        Returns:
+            bool: True if the repository existed, False otherwise
+        """
+        try:
+            # Match the ID as stored and in its ObjectId form in every collection
+            candidates = {"$in": id_candidates(repo_id)}
+            result = self.db.repositories.delete_one({"_id": candidates})
+            self.db.files.delete_many({"repo_id": candidates})
+            self.db.functions.delete_many({"repo_id": candidates})
+            self.db.queries.delete_many({"repo_id": candidates})
+        except Exception as e:
+            self.logger.error(f"Error deleting repository {repo_id}: {str(e)}")
+            raise
+        finally:
+            # Evict even after a partial delete, so no reader is served the old state
+            repository_cache.pop((self.uri, self.db_name, str(repo_id)))
+            repository_list_cache.pop((self.uri, self.db_name))
+            query_history_cache.pop((self.uri, self.db_name, str(repo_id)))
+        
+        return result.deleted_count > 0
+    
+    def list_files(self, repo_id: str) -> List[Dict[str, Any]]:
+        """
+        List a repository's files without their content or function code.
+        
+        Args:
+            repo_id: Repository ID
+            
+        Returns:
+            list: File metadata documents, empty on error
+        """
+        try:
+            return list(self.db.files.find(
+                {"repo_id": {"$in": id_candidates(repo_id)}},
+                FILE_META_PROJECTION
+            ))
+        except Exception as e:
+            self.logger.error(f"Error listing files for repository {repo_id}: {str(e)}")
+            return []
+    
+    def batch(self, repository_id: str, first_ingest: bool = False) -> WriteBatch:
+        """
+        Start a batch that coalesces file writes for a repository.
+        
+        Args:
+            repository_id: Repository ID
+            first_ingest: Whether the repository has no stored files yet
+            
+        Returns:
+            WriteBatch: Batch to use as a context manager; it flushes on exit and
+                raises RuntimeError if any of its files could not be saved
+        """
+        return WriteBatch(self, repository_id, first_ingest=first_ingest)
+    
     def save_file(self, repository_id: str, file_path: str, language: str, 
                  content: str, functions: List[Dict], documentation: List[Dict], 
                  summary: str = "") -> bool:
@@ -178,32 +518,126 @@ class DBClient:
         Returns:
             bool: True if successful, False otherwise
         """
-        try:
-            # Convert string ID to ObjectId if needed
-            if not isinstance(repository_id, ObjectId) and ObjectId.is_valid(repository_id):
-                repository_id = ObjectId(repository_id)
-                
-            # Create file document
-            file_doc = {
+        return self.save_files(repository_id, [{
+            "path": file_path,
+            "language": language,
+            "content": content,
+            "functions": functions,
+            "documentation": documentation,
+            "summary": summary
+        }])
+    
+    def save_files(self, repository_id: str, files: List[Dict[str, Any]], 
+                   first_ingest: bool = False) -> bool:
+        """
+        Save several files to the database in bulk.
+        
+        Args:
+            repository_id: Repository ID
+            files: Processed files with path, language, content, functions,
+                documentation and optional summary, line count and size
+            first_ingest: Whether the repository has no stored files yet, so
+                plain inserts can be used instead of upserts
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        # Convert string ID to ObjectId if needed
+        repository_id = to_object_id(repository_id) or repository_id
+        
+        # One timestamp for the whole batch
+        created_at = datetime.now(timezone.utc)
+        file_docs = [
+            {
                 "repo_id": repository_id,
-                "path": file_path,
-                "language": language,
-                "content": content,
-                "functions": functions,
-                "documentation": documentation,
-                "summary": summary,
-                "created_at": datetime.utcnow()
+                "path": file["path"],
+                "name_lc": file_name_key(file["path"]),
+                "language": file["language"],
+                "content": file["content"],
+                "line_count": file.get("line_count", 0),
+                "size_bytes": file.get("size_bytes", 0),
+                "functions": file["functions"],
+                "documentation": file["documentation"],
+                "summary": file.get("summary", ""),
+                "created_at": created_at
             }
+            for file in files
+        ]
+        
+        if first_ingest:
+            return self.bulk_insert("files", file_docs, keys=("repo_id", "path"))
+        return self.bulk_upsert("files", file_docs, keys=("repo_id", "path"))
+    
+    def bulk_upsert(self, collection_name: str, docs: List[Dict[str, Any]], 
+                    keys: Tuple[str, ...] = ("_id",), chunk_size: int = 1000) -> bool:
+        """
+        Insert or update many documents using unordered bulk writes.
+        
+        Args:
+            collection_name: Name of the collection
+            docs: Documents to write
+            keys: Fields that identify an existing document
+            chunk_size: Maximum number of operations sent per round trip
             
-            # Insert or update
-            self.db.files.update_one(
-                {"repo_id": repository_id, "path": file_path},
-                {"$set": file_doc},
-                upsert=True
-            )
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            operations = [
+                UpdateOne({key: doc[key] for key in keys}, {"$set": doc}, upsert=True)
+                for doc in docs
+            ]
+            
+            collection = self.db[collection_name]
+            for start in range(0, len(operations), chunk_size):
+                collection.bulk_write(operations[start:start + chunk_size], ordered=False)
             
             return True
             
         except Exception as e:
-            self.logger.error(f"Error saving file {file_path}: {str(e)}")
-            return False 
\ No newline at end of file
+            self.logger.error(f"Error bulk writing to {collection_name}: {str(e)}")
+            return False
+    
+    def bulk_insert(self, collection_name: str, docs: List[Dict[str, Any]], 
+                    keys: Tuple[str, ...] = ("_id",), chunk_size: int = 1000) -> bool:
+        """
+        Insert many new documents using unordered inserts.
+        
+        Cheaper than bulk_upsert when the documents are not expected to exist.
+        Any that already do, according to a unique index, are upserted instead.
+        
+        Args:
+            collection_name: Name of the collection
+            docs: Documents to write
+            keys: Fields that identify an existing document
+            chunk_size: Maximum number of documents sent per round trip
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        collection = self.db[collection_name]
+        duplicates = []
+        
+        try:
+            for start in range(0, len(docs), chunk_size):
+                chunk = docs[start:start + chunk_size]
+                try:
+                    collection.insert_many(chunk, ordered=False)
+                except BulkWriteError as e:
+                    write_errors = e.details.get("writeErrors", [])
+                    if any(error["code"] != DUPLICATE_KEY_ERROR for error in write_errors):
+                        raise
+                    duplicates.extend(chunk[error["index"]] for error in write_errors)
+            
+        except Exception as e:
+            self.logger.error(f"Error bulk inserting into {collection_name}: {str(e)}")
+            return False
+        
+        if not duplicates:
+            return True
+        
+        # insert_many assigned each document an _id, which must not be
+        # written over the existing document's
+        for doc in duplicates:
+            doc.pop("_id", None)
+        return self.bulk_upsert(collection_name, duplicates, keys=keys, chunk_size=chunk_size)
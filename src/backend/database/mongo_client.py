@@ -3,20 +3,33 @@ MongoDB client for RepoMind.
 Handles database connections and operations.
 """
 
+import copy
 import logging
-from datetime import datetime
-from typing import Optional, Dict, Any, List
-from pymongo import MongoClient
+import time
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, Iterator, List
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 from bson import ObjectId
 
 from config import MONGODB_URI, MONGODB_DB, MONGODB_TIMEOUT_MS
+from src.backend.database.cache import query_history_cache, repository_cache, repository_list_cache
+from src.backend.database.db_client import get_mongo_client, id_candidates
+
+# Documents fetched per getMore when streaming large cursors
+CURSOR_BATCH_SIZE = 200
+
+# Projections that also have the server convert _id to a string
+REPO_LIST_PROJECTION = {"_id": {"$toString": "$_id"}, "name": 1, "source": 1, "source_type": 1, "created_at": 1}
+QUERY_HISTORY_PROJECTION = {"_id": {"$toString": "$_id"}, "query": 1, "response": 1, "timestamp": 1}
 
 logger = logging.getLogger(__name__)
 
 class MongoDBClient:
     """MongoDB client for RepoMind."""
     
+    # How long a ping result is trusted by check_connection
+    PING_TTL_SECONDS = 5.0
+    
     def __init__(self):
         """Initialize the MongoDB client."""
         self.client = None
@@ -24,6 +37,8 @@ class MongoDBClient:
         self.uri = MONGODB_URI
         self.db_name = MONGODB_DB
         self.timeout_ms = MONGODB_TIMEOUT_MS
+        self._last_ping_ok = False
+        self._last_ping_at = 0.0
         logger.info(f"Initializing MongoDB client with URI: {self.uri}, DB: {self.db_name}")
     
     def connect(self) -> bool:
@@ -35,14 +50,14 @@ class MongoDBClient:
         """
         try:
             logger.info(f"Connecting to MongoDB at {self.uri}")
-            # Set serverSelectionTimeoutMS to fail quickly if the server is not available
-            self.client = MongoClient(self.uri, serverSelectionTimeoutMS=self.timeout_ms)
-            
-            # Force connection to verify it works
-            self.client.admin.command('ping')
+            # Reuse the shared client; serverSelectionTimeoutMS makes a
+            # first connection fail quickly if the server is not available
+            self.client = get_mongo_client(self.uri, self.timeout_ms)
             
             # Set database
             self.db = self.client[self.db_name]
+            self._last_ping_ok = True
+            self._last_ping_at = time.monotonic()
             
             logger.info(f"Successfully connected to MongoDB database '{self.db_name}'")
             return True
@@ -59,17 +74,20 @@ class MongoDBClient:
             return False
     
     def disconnect(self):
-        """Disconnect from MongoDB."""
+        """Disconnect from MongoDB, leaving the shared client open for other callers."""
         if self.client:
-            self.client.close()
             self.client = None
             self.db = None
+            self._last_ping_ok = False
             logger.info("Disconnected from MongoDB")
     
     def check_connection(self) -> bool:
         """
         Check if the connection to MongoDB is active.
         
+        Results are reused for PING_TTL_SECONDS so repeated checks do not
+        each cost a round trip.
+        
         Returns:
             bool: True if connection is active, False otherwise
         """
@@ -77,14 +95,20 @@ class MongoDBClient:
             logger.warning("MongoDB client is not initialized")
             return False
         
+        if time.monotonic() - self._last_ping_at < self.PING_TTL_SECONDS:
+            return self._last_ping_ok
+        
         try:
             # Try to ping the server
             self.client.admin.command('ping')
             logger.debug("MongoDB connection is active")
-            return True
+            self._last_ping_ok = True
         except Exception as e:
             logger.error(f"MongoDB connection check failed: {str(e)}")
-            return False
+            self._last_ping_ok = False
+        
+        self._last_ping_at = time.monotonic()
+        return self._last_ping_ok
     
     def get_collection(self, collection_name: str):
         """
@@ -104,7 +128,8 @@ class MongoDBClient:
     
     def __str__(self) -> str:
         """String representation of the MongoDB client."""
-        connection_status = "Connected" if self.check_connection() else "Disconnected"
+        # Report the last known state; formatting must not touch the network
+        connection_status = "Connected" if self.client and self._last_ping_ok else "Disconnected"
         return f"MongoDBClient({connection_status}, URI={self.uri}, DB={self.db_name})"
 
     def store_repo(self, repo_data: Dict[str, Any]) -> str:
@@ -123,6 +148,7 @@ class MongoDBClient:
                 del repo_data["_id"]
             
             result = self.db.repositories.insert_one(repo_data)
+            repository_list_cache.pop((self.uri, self.db_name))
             repo_id = str(result.inserted_id)
             logger.info("Stored repository with ID: %s", repo_id)
             return repo_id
@@ -141,11 +167,8 @@ class MongoDBClient:
             dict: Repository data or None if not found
         """
         try:
-            # Try to find by string ID first
-            repo = self.db.repositories.find_one({"_id": repo_id})
-            if not repo:
-                # Try with ObjectId
-                repo = self.db.repositories.find_one({"_id": ObjectId(repo_id)})
+            # Match the string ID and its ObjectId form in one query
+            repo = self.db.repositories.find_one({"_id": {"$in": id_candidates(repo_id)}})
             
             if repo and isinstance(repo["_id"], ObjectId):
                 repo["_id"] = str(repo["_id"])
@@ -154,6 +177,18 @@ class MongoDBClient:
             logger.error("Failed to retrieve repository %s: %s", repo_id, str(e))
             return None
     
+    def iter_repos(self) -> Iterator[Dict[str, Any]]:
+        """
+        Stream repository metadata without materializing the whole listing.
+        
+        Returns:
+            Iterator: Repository metadata documents
+        """
+        return self.db.repositories.aggregate(
+            [{"$project": REPO_LIST_PROJECTION}],
+            batchSize=CURSOR_BATCH_SIZE
+        )
+    
     def list_repos(self) -> List[Dict[str, Any]]:
         """
         List all repositories.
@@ -161,20 +196,14 @@ class MongoDBClient:
         Returns:
             list: List of repository metadata
         """
+        cache_key = (self.uri, self.db_name)
+        cached = repository_list_cache.get(cache_key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
         try:
-            repos = list(self.db.repositories.find({}, {
-                "_id": 1,
-                "name": 1,
-                "source": 1,
-                "source_type": 1,
-                "created_at": 1
-            }))
-            
-            # Convert ObjectId to string
-            for repo in repos:
-                if isinstance(repo["_id"], ObjectId):
-                    repo["_id"] = str(repo["_id"])
-            
+            repos = list(self.iter_repos())
+            repository_list_cache.set(cache_key, copy.deepcopy(repos))
             return repos
         except Exception as e:
             logger.error("Failed to list repositories: %s", str(e))
@@ -197,9 +226,10 @@ class MongoDBClient:
                 "repo_id": repo_id,
                 "query": query,
                 "response": response,
-                "timestamp": self.db.client.server_info().get("localTime", None)
+                "timestamp": datetime.now(timezone.utc)
             }
             result = self.db.queries.insert_one(query_doc)
+            query_history_cache.pop((self.uri, self.db_name, str(repo_id)))
             query_id = str(result.inserted_id)
             logger.info("Stored query with ID: %s", query_id)
             return query_id
@@ -207,6 +237,22 @@ class MongoDBClient:
             logger.error("Failed to store query: %s", str(e))
             raise
     
+    def iter_query_history(self, repo_id: str) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a repository's query history, newest first.
+        
+        Args:
+            repo_id: Repository ID
+            
+        Returns:
+            Iterator: Query-response pairs
+        """
+        return self.db.queries.aggregate([
+            {"$match": {"repo_id": repo_id}},
+            {"$sort": {"timestamp": -1}},
+            {"$project": QUERY_HISTORY_PROJECTION}
+        ], batchSize=CURSOR_BATCH_SIZE)
+    
     def get_query_history(self, repo_id: str) -> List[Dict[str, Any]]:
         """
         Retrieve query history for a repository.
@@ -217,17 +263,14 @@ class MongoDBClient:
         Returns:
             list: List of query-response pairs
         """
+        cache_key = (self.uri, self.db_name, str(repo_id))
+        cached = query_history_cache.get(cache_key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
         try:
-            queries = list(self.db.queries.find(
-                {"repo_id": repo_id},
-                {"_id": 1, "query": 1, "response": 1, "timestamp": 1}
-            ).sort("timestamp", -1))
-            
-            # Convert ObjectId to string
-            for query in queries:
-                if isinstance(query["_id"], ObjectId):
-                    query["_id"] = str(query["_id"])
-            
+            queries = list(self.iter_query_history(repo_id))
+            query_history_cache.set(cache_key, copy.deepcopy(queries))
             return queries
         except Exception as e:
             logger.error("Failed to retrieve query history: %s", str(e))
@@ -244,15 +287,16 @@ class MongoDBClient:
             bool: True if deletion successful, False otherwise
         """
         try:
-            # Try to delete with string ID first
-            repo_result = self.db.repositories.delete_one({"_id": repo_id})
-            if repo_result.deleted_count == 0:
-                # Try with ObjectId
-                repo_result = self.db.repositories.delete_one({"_id": ObjectId(repo_id)})
+            # Match the string ID and its ObjectId form in one command
+            repo_result = self.db.repositories.delete_one({"_id": {"$in": id_candidates(repo_id)}})
             
             # Delete associated queries
             query_result = self.db.queries.delete_many({"repo_id": repo_id})
             
+            repository_cache.pop((self.uri, self.db_name, str(repo_id)))
+            repository_list_cache.pop((self.uri, self.db_name))
+            query_history_cache.pop((self.uri, self.db_name, str(repo_id)))
+            
             logger.info(
                 "Deleted repository %s and %d associated queries",
                 repo_id, query_result.deleted_count
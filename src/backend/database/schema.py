@@ -3,9 +3,9 @@ Database schema definitions for RepoMind.
 This module defines the structure of the MongoDB collections used by the application.
 """
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List, Dict, Any, Optional
-from pydantic import BaseModel, Field, AnyHttpUrl
+from pydantic import AnyHttpUrl, BaseModel, ConfigDict, Field, field_serializer
 
 
 class Function(BaseModel):
@@ -21,9 +21,7 @@ class Function(BaseModel):
     code: str
     language: str
     
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
 
 
 class FileInfo(BaseModel):
@@ -37,9 +35,7 @@ class FileInfo(BaseModel):
     line_count: int = 0
     content: str
     
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
 
 
 class Repository(BaseModel):
@@ -48,15 +44,14 @@ class Repository(BaseModel):
     name: str
     status: str = "processing"
     source_type: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     analysis_completed: bool = False
     
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            datetime: lambda dt: dt.isoformat()
-        }
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
+    
+    @field_serializer("created_at", when_used="json")
+    def _serialize_created_at(self, created_at: datetime) -> str:
+        return created_at.isoformat()
 
 
 class QueryResponse(BaseModel):
@@ -73,11 +68,9 @@ class Query(BaseModel):
     repo_id: str
     query: str
     response: QueryResponse
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
 
 
 class GitHubRepository(Repository):
@@ -130,12 +123,10 @@ class UserSettings(BaseModel):
     username: str
     theme: str = "light"
     preferred_language: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     last_login: Optional[datetime] = None
     
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
 
 
 class RepositoryTag(BaseModel):
@@ -144,11 +135,9 @@ class RepositoryTag(BaseModel):
     repo_id: str
     name: str
     color: str = "#007bff"
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
 
 
 class RepositoryStar(BaseModel):
@@ -156,8 +145,6 @@ class RepositoryStar(BaseModel):
     id: str = Field(None, alias="_id")
     repo_id: str
     user_id: str
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True 
\ No newline at end of file
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True) 
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+Response cache for repository queries.
+Matches questions by keyword overlap so rephrased questions reuse earlier answers.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Words that flip or narrow a question's meaning; queries differing by one never match
+CONTRAST_WORDS = frozenset({"not", "no", "nor", "without", "except", "but", "never"})
+
+
+def is_contrast_word(word: str) -> bool:
+    """
+    Check whether a keyword negates or contrasts, such as "not" or "isn't".
+    
+    Args:
+        word: Normalized keyword
+        
+    Returns:
+        bool: True if the word changes the meaning of the question
+    """
+    return word in CONTRAST_WORDS or word.endswith("n't")
+
+
+def _shared_order(keywords: Tuple[str, ...], shared: frozenset) -> Tuple[str, ...]:
+    """Keep the keywords two queries share, in the order this query names them."""
+    return tuple(word for word in keywords if word in shared)
+
+
+class QueryResponseCache:
+    """Thread-safe, per-repository cache of query responses keyed by query keywords."""
+
+    def __init__(self, max_entries_per_repo: int = 64, ttl: float = 600.0, min_similarity: float = 0.85):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries_per_repo: Maximum number of responses kept per repository
+            ttl: Seconds a response stays valid
+            min_similarity: Minimum Jaccard similarity between keyword sets for a hit;
+                above 0.8 so one extra keyword never matches a query of four
+        """
+        self.max_entries_per_repo = max_entries_per_repo
+        self.ttl = ttl
+        self.min_similarity = min_similarity
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, repo_id: str, keywords: Tuple[str, ...], 
+            identifiers: Tuple[str, ...] = ()) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached response whose keywords best match the given ones.
+
+        Similar queries that name different code identifiers (RepoLoader vs
+        RepoLoaderFactory) never match, however much else they share, and
+        neither do queries that differ by a negation ("handled" vs "not handled")
+        or name their shared keywords in another order ("does a call b" vs
+        "does b call a").
+
+        Args:
+            repo_id: Repository ID; responses never cross repositories
+            keywords: Normalized keywords of the query, in query order
+            identifiers: Code identifiers named in the query, in query order
+
+        Returns:
+            dict: Copy of the cached response, or None if nothing is similar enough
+        """
+        keyword_set = frozenset(keywords)
+        with self._lock:
+            entries = self._entries.get(repo_id)
+            if not entries:
+                return None
+
+            now = time.monotonic()
+            best_key, best_similarity = None, self.min_similarity
+            for key, (expires_at, cached_identifiers, cached_keywords, _) in list(entries.items()):
+                if expires_at <= now:
+                    del entries[key]
+                    continue
+                if cached_identifiers != identifiers:
+                    continue
+                if any(is_contrast_word(word) for word in key ^ keyword_set):
+                    continue
+                shared = key & keyword_set
+                if _shared_order(cached_keywords, shared) != _shared_order(keywords, shared):
+                    continue
+
+                similarity = len(shared) / len(key | keyword_set)
+                if similarity >= best_similarity:
+                    best_key, best_similarity = key, similarity
+
+            if best_key is None:
+                return None
+
+            entries.move_to_end(best_key)
+            return copy.deepcopy(entries[best_key][3])
+
+    def set(self, repo_id: str, keywords: Tuple[str, ...], response: Dict[str, Any], 
+            identifiers: Tuple[str, ...] = ()) -> None:
+        """
+        Cache a response, evicting the repository's least recently used one when full.
+
+        Args:
+            repo_id: Repository ID
+            keywords: Normalized keywords of the query, in query order
+            response: Response to cache
+            identifiers: Code identifiers named in the query, in query order
+        """
+        key = frozenset(keywords)
+        with self._lock:
+            entries = self._entries.setdefault(repo_id, OrderedDict())
+            entries[key] = (time.monotonic() + self.ttl, identifiers, keywords, copy.deepcopy(response))
+            entries.move_to_end(key)
+            if len(entries) > self.max_entries_per_repo:
+                entries.popitem(last=False)
+
+    def invalidate(self, repo_id: str) -> None:
+        """
+        Drop every cached response for a repository.
+
+        Args:
+            repo_id: Repository ID
+        """
+        with self._lock:
+            self._entries.pop(repo_id, None)
+
+
+# Shared by every QueryProcessor in the process
+query_response_cache = QueryResponseCache()
@@ -3,20 +3,125 @@ Query processor for RepoMind.
 Handles processing of natural language queries about repositories.
 """
 
+import asyncio
 import logging
 import re
 import traceback
 import json
-from typing import Dict, List, Any, Optional
-from bson import ObjectId
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Sequence, Set, Tuple
 
 from src.agents.llm_client import LLMClient
+from src.backend.database.db_client import QUERY_HISTORY_INDEX, id_candidates
+from src.backend.llm.query_cache import CONTRAST_WORDS, query_response_cache
 from config import MAX_TOKENS
 
+try:
+    # tiktoken counts tokens the way OpenAI models do
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Rough size of a token in characters, used when tiktoken is unavailable
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _token_encoding():
+    """Get the tokenizer, or None to estimate tokens from characters."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # The encoding is downloaded on first use and may be unreachable
+        return None
+
+
+def _count_tokens(text: str) -> int:
+    """
+    Count the tokens in a text.
+    
+    Args:
+        text: Text to measure
+        
+    Returns:
+        int: Token count, estimated when tiktoken is unavailable
+    """
+    encoding = _token_encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _truncate_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut a text down to a token budget.
+    
+    Args:
+        text: Text to truncate
+        max_tokens: Maximum number of tokens to keep
+        
+    Returns:
+        str: The text, or its longest prefix within the budget
+    """
+    max_tokens = max(max_tokens, 0)
+    encoding = _token_encoding()
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+# Pending history writes; the event loop only holds weak references to tasks
+_background_tasks: Set[asyncio.Task] = set()
+
+# Common stop words left out of query keywords
+_STOP_WORDS = frozenset({
+    "the", "a", "an", "in", "on", "at", "is", "are", "was", "were", "and", "or", 
+    "but", "of", "for", "with", "about", "to", "from"
+})
+
+_QUOTED_RE = re.compile(r'"([^"]*)"')
+_WORD_RE = re.compile(r"[\w.]+")
+
+# Sections of a structured LLM response
+_ANSWER_RE = re.compile(r'ANSWER:(.*?)(?:CODE:|REFERENCES:|$)', re.DOTALL)
+_CODE_RE = re.compile(r'CODE.*?:\s*```.*?\n(.*?)```', re.DOTALL)
+_REFS_RE = re.compile(r'REFERENCES:(.*?)$', re.DOTALL)
+
+# Words that look like code identifiers: snake_case, dotted names, digits, or
+# an uppercase letter after the first character (CamelCase)
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_][\w.]*(?:[_.\d]|(?<=.)[A-Z])[\w.]*")
+
 
 class QueryProcessor:
     """Query processor class for handling repository queries."""
     
+    # Text-search matches fetched per query; the prompt uses the top 5 files
+    RELEVANT_FILE_LIMIT = 5
+    RELEVANT_FUNCTION_LIMIT = 20
+    
+    # Repository file paths listed in the prompt
+    PROMPT_FILE_LIMIT = 50
+    
+    # Tokens left for the answer; the rest of MAX_TOKENS is the prompt budget,
+    # split between the context sections by these shares
+    RESPONSE_TOKENS = 1500
+    PROMPT_TOKEN_SHARES = {
+        "current_file": 0.3,
+        "relevant_files": 0.5,
+        "all_files": 0.1,
+        "functions": 0.1,
+    }
+    
+    # Lowercased names of files used as context when nothing matches a query
+    COMMON_FILES = ("readme.md", "setup.py", "requirements.txt", "package.json", "main.py", "app.py", "index.js")
+    
     def __init__(self, db_client):
         """
         Initialize the processor with a database client.
@@ -46,12 +151,10 @@ class QueryProcessor:
             
             # Get repository information
             try:
-                if ObjectId.is_valid(repo_id):
-                    # Try with ObjectId first
-                    repo = self.db_client.db.repositories.find_one({"_id": ObjectId(repo_id)})
-                if not repo:
-                    # Try with string ID
-                    repo = self.db_client.db.repositories.find_one({"_id": repo_id})
+                # Match the string ID and its ObjectId form in one query
+                repo = await asyncio.to_thread(
+                    self.db_client.db.repositories.find_one, {"_id": {"$in": id_candidates(repo_id)}}
+                )
             except Exception as e:
                 self.logger.error(f"Error finding repository: {str(e)}")
                 repo = None
@@ -65,8 +168,21 @@ class QueryProcessor:
                     "confidence": 0.0
                 }
             
+            # Answers to plain questions are reused for rephrasings of them;
+            # file- or context-specific questions always go to the LLM
+            cache_keywords = None
+            if file_path is None and context is None:
+                cache_keywords = self._keyword_signature(query)
+                cache_identifiers = self._identifier_signature(query)
+            if cache_keywords:
+                cached_response = query_response_cache.get(repo_id, cache_keywords, cache_identifiers)
+                if cached_response is not None:
+                    self.logger.info(f"Answering query for repository {repo_id} from cache")
+                    self._save_query_in_background(repo_id, query, cached_response)
+                    return cached_response
+            
             # Prepare context for LLM query
-            context_data = await self._prepare_context(repo_id, query, file_path)
+            context_data = await self._prepare_context(repo_id, query, repo, file_path)
             
             # Add user-provided context if available
             if context:
@@ -79,7 +195,7 @@ class QueryProcessor:
             self.logger.info(f"Generated context for query: Files: {len(context_data.get('relevant_files', []))}, Repo summary length: {len(context_data.get('repo_summary', ''))}")
             
             # Get response from LLM
-            llm_response = self.llm_client.generate_text(prompt, max_tokens=1500)
+            llm_response = self.llm_client.generate_text(prompt, max_tokens=self.RESPONSE_TOKENS)
             
             # Check if there's an error in the response
             if "Error generating text:" in llm_response:
@@ -93,9 +209,11 @@ class QueryProcessor:
             
             # Parse the response
             parsed_response = self._parse_response(llm_response)
+            if cache_keywords:
+                query_response_cache.set(repo_id, cache_keywords, parsed_response, cache_identifiers)
             
-            # Save the query and response
-            self._save_query(repo_id, query, parsed_response)
+            # Save the query and response once the answer is on its way
+            self._save_query_in_background(repo_id, query, parsed_response)
             
             return parsed_response
             
@@ -109,68 +227,106 @@ class QueryProcessor:
                 "confidence": 0.0
             }
     
-    async def _prepare_context(self, repo_id: str, query: str, file_path: Optional[str] = None) -> Dict[str, Any]:
+    async def _prepare_context(self, repo_id: str, query: str, repo: Dict[str, Any], 
+                               file_path: Optional[str] = None) -> Dict[str, Any]:
         """
         Prepare context for the query.
         
         Args:
             repo_id: Repository ID
             query: User query
+            repo: Repository document
             file_path: Optional specific file path
             
         Returns:
             dict: Context data
         """
+        # The lookups are independent, so run them concurrently
+        file_context, file_paths, relevant_files = await asyncio.gather(
+            asyncio.to_thread(self._get_file_context, repo_id, file_path) if file_path else asyncio.sleep(0),
+            asyncio.to_thread(self._list_file_paths, repo_id),
+            self._find_relevant_files(repo_id, query),
+            return_exceptions=True
+        )
+        if isinstance(file_context, Exception):
+            raise file_context
+        if isinstance(relevant_files, Exception):
+            raise relevant_files
+        
         context = {}
         
         # If a specific file is provided, use it as context
-        if file_path:
-            file = self.db_client.db.files.find_one({"repo_id": repo_id, "path": file_path})
-            if file:
-                context["current_file"] = {
-                    "path": file_path,
-                    "content": file.get("content", ""),
-                    "language": file.get("language", ""),
-                    "summary": file.get("summary", "")
-                }
-                
-                # Get functions in this file
-                functions = list(self.db_client.db.functions.find({"repo_id": repo_id, "file_path": file_path}))
-                context["functions"] = functions
-                
-                self.logger.info(f"Added specific file context: {file_path}")
-        
-        # Get repository summary
-        try:
-            if ObjectId.is_valid(repo_id):
-                repo = self.db_client.db.repositories.find_one({"_id": ObjectId(repo_id)})
-            if not repo:
-                repo = self.db_client.db.repositories.find_one({"_id": repo_id})
-                
-            if repo:
-                context["repo_summary"] = repo.get("summary", "")
-                context["repo_name"] = repo.get("name", "Unknown Repository")
-                context["repo_type"] = repo.get("type", repo.get("source_type", "Unknown"))
-        except Exception as e:
-            self.logger.error(f"Error getting repository for context: {str(e)}")
-        
-        # Get list of all files in the repository
-        try:
-            all_files = list(self.db_client.db.files.find({"repo_id": repo_id}, {"path": 1, "_id": 0}))
-            file_paths = [f["path"] for f in all_files if "path" in f]
-            context["all_files"] = file_paths
-            self.logger.info(f"Added {len(file_paths)} files to context")
-        except Exception as e:
-            self.logger.error(f"Error getting all files: {str(e)}")
-            context["all_files"] = []
+        if file_context:
+            context.update(file_context)
+            self.logger.info(f"Added specific file context: {file_path}")
+        
+        # Repository summary comes from the document process_query already fetched
+        context["repo_summary"] = repo.get("summary", "")
+        context["repo_name"] = repo.get("name", "Unknown Repository")
+        context["repo_type"] = repo.get("type", repo.get("source_type", "Unknown"))
+        
+        # Files in the repository, as many as the prompt lists, and their total
+        if isinstance(file_paths, Exception):
+            self.logger.error(f"Error getting all files: {str(file_paths)}")
+            file_paths, file_count = [], 0
+        else:
+            file_paths, file_count = file_paths
+            self.logger.info(f"Added {len(file_paths)} of {file_count} files to context")
+        context["all_files"] = file_paths
+        context["file_count"] = file_count
         
-        # Select relevant files based on the query
-        relevant_files = await self._find_relevant_files(repo_id, query)
+        # Relevant files based on the query
         context["relevant_files"] = relevant_files[:5]  # Limit to top 5 relevant files
         self.logger.info(f"Found {len(relevant_files)} relevant files, using top 5")
         
         return context
     
+    def _get_file_context(self, repo_id: str, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a file and its functions as query context.
+        
+        Args:
+            repo_id: Repository ID
+            file_path: File path
+            
+        Returns:
+            dict: "current_file" and "functions" context entries, or None if the file is missing
+        """
+        file = self.db_client.db.files.find_one({"repo_id": repo_id, "path": file_path})
+        if not file:
+            return None
+        
+        return {
+            "current_file": {
+                "path": file_path,
+                "content": file.get("content", ""),
+                "language": file.get("language", ""),
+                "summary": file.get("summary", "")
+            },
+            "functions": list(self.db_client.db.functions.find({"repo_id": repo_id, "file_path": file_path}))
+        }
+    
+    def _list_file_paths(self, repo_id: str) -> Tuple[List[str], int]:
+        """
+        List the file paths the prompt shows for a repository.
+        
+        Args:
+            repo_id: Repository ID
+            
+        Returns:
+            tuple: Up to PROMPT_FILE_LIMIT file paths, and the repository's total file count
+        """
+        # Limit on the server and fetch the page in a single batch
+        files = self.db_client.db.files.find(
+            {"repo_id": repo_id}, {"path": 1, "_id": 0}
+        ).limit(self.PROMPT_FILE_LIMIT).batch_size(self.PROMPT_FILE_LIMIT)
+        file_paths = [f["path"] for f in files if "path" in f]
+        
+        # Only a full page can leave files unlisted
+        if len(file_paths) < self.PROMPT_FILE_LIMIT:
+            return file_paths, len(file_paths)
+        return file_paths, self.db_client.db.files.count_documents({"repo_id": repo_id})
+    
     async def _find_relevant_files(self, repo_id: str, query: str) -> List[Dict[str, Any]]:
         """
         Find files relevant to the query.
@@ -186,106 +342,202 @@ class QueryProcessor:
         keywords = self._extract_keywords(query)
         self.logger.info(f"Extracted keywords from query: {keywords}")
         
+        relevant_files = await asyncio.to_thread(self._search_relevant_files, repo_id, keywords) if keywords else []
+        
+        # If no relevant files found, try to get some common important files
+        if not relevant_files:
+            relevant_files = await asyncio.to_thread(self._find_common_files, repo_id)
+        
+        # Candidates are chosen on metadata alone; only the files that make
+        # it into the prompt have their content fetched
+        await asyncio.to_thread(self._attach_contents, repo_id, relevant_files[:self.RELEVANT_FILE_LIMIT])
+        
+        return relevant_files
+    
+    def _attach_contents(self, repo_id: str, files: List[Dict[str, Any]]) -> None:
+        """
+        Fetch truncated content for files and attach it in place.
+        
+        Args:
+            repo_id: Repository ID
+            files: Files to fill in, each with a path
+        """
+        if not files:
+            return
+        
+        try:
+            # Truncate on the server so only the snippet crosses the wire
+            contents = {
+                doc["path"]: doc["content"]
+                for doc in self.db_client.db.files.aggregate([
+                    {"$match": {"repo_id": repo_id, "path": {"$in": [file["path"] for file in files]}}},
+                    {"$project": {"_id": 0, "path": 1, "content": {"$substrCP": ["$content", 0, MAX_TOKENS//10]}}}
+                ])
+            }
+        except Exception as e:
+            self.logger.error(f"Error fetching content for relevant files: {str(e)}")
+            return
+        
+        for file in files:
+            content = contents.get(file["path"])
+            if content:
+                file["content"] = content
+    
+    def _find_common_files(self, repo_id: str) -> List[Dict[str, Any]]:
+        """
+        Find well-known entry point and manifest files, such as README.md.
+        
+        Args:
+            repo_id: Repository ID
+            
+        Returns:
+            list: The first file found for each common name, in COMMON_FILES order
+        """
+        try:
+            # Exact matches on the indexed lowercased base name, in one query
+            files = self.db_client.db.files.find(
+                {"repo_id": repo_id, "name_lc": {"$in": list(self.COMMON_FILES)}},
+                {"path": 1, "name_lc": 1, "summary": 1, "language": 1, "_id": 0}
+            )
+            
+            files_by_name = {}
+            for file in files:
+                files_by_name.setdefault(file.pop("name_lc"), file)
+        except Exception as e:
+            self.logger.error(f"Error searching for common files: {str(e)}")
+            return []
+        
+        common_files = []
+        for name in self.COMMON_FILES:
+            file = files_by_name.get(name)
+            if file:
+                common_files.append(file)
+        return common_files
+    
+    def _search_relevant_files(self, repo_id: str, keywords: Sequence[str]) -> List[Dict[str, Any]]:
+        """
+        Find files whose path, summary, content or functions match the keywords.
+        
+        Args:
+            repo_id: Repository ID
+            keywords: Keywords extracted from the query
+            
+        Returns:
+            list: Matching files, best matches first, with matched functions attached
+        """
         relevant_files = []
         
-        # Check for files that match keywords in path or summary
-        for keyword in keywords:
-            # Use case-insensitive regex search in path and summary
-            try:
-                files = self.db_client.db.files.find({
-                    "repo_id": repo_id,
-                    "$or": [
-                        {"path": {"$regex": keyword, "$options": "i"}},
-                        {"summary": {"$regex": keyword, "$options": "i"}}
-                    ]
-                }, {"path": 1, "summary": 1, "language": 1, "content": 1, "_id": 0})
-                
-                for file in files:
-                    # Only add if not already in the list
-                    if file not in relevant_files:
-                        # Add the file content but limit its size
-                        if "content" in file and file["content"]:
-                            # Truncate content to avoid token limits
-                            file["content"] = file["content"][:MAX_TOKENS//10]
-                        relevant_files.append(file)
-            except Exception as e:
-                self.logger.error(f"Error searching for files with keyword {keyword}: {str(e)}")
+        # One text-index search per collection covers every keyword, best
+        # matches first
+        search = {"$search": " ".join(keywords)}
+        score = {"$meta": "textScore"}
         
-        # Check for functions that match keywords
-        for keyword in keywords:
-            try:
-                functions = self.db_client.db.functions.find({
-                    "repo_id": repo_id,
-                    "$or": [
-                        {"name": {"$regex": keyword, "$options": "i"}},
-                        {"description": {"$regex": keyword, "$options": "i"}}
-                    ]
-                }, {"file_path": 1, "name": 1, "description": 1, "code": 1, "_id": 0})
-                
-                for func in functions:
-                    file_path = func.get("file_path", "")
-                    # Get the file data if it exists
-                    file = self.db_client.db.files.find_one({"repo_id": repo_id, "path": file_path}, {"path": 1, "summary": 1, "language": 1, "content": 1, "_id": 0})
-                    
-                    if file and file not in relevant_files:
-                        # Add function data to the file
-                        if "functions" not in file:
-                            file["functions"] = []
-                        file["functions"].append(func)
-                        
-                        # Add the file content but limit its size
-                        if "content" in file and file["content"]:
-                            # Truncate content to avoid token limits
-                            file["content"] = file["content"][:MAX_TOKENS//10]
-                            
-                        relevant_files.append(file)
-            except Exception as e:
-                self.logger.error(f"Error searching for functions with keyword {keyword}: {str(e)}")
+        try:
+            files = self.db_client.db.files.find(
+                {"repo_id": repo_id, "$text": search},
+                {"path": 1, "summary": 1, "language": 1, "_id": 0, "score": score}
+            ).sort([("score", score)]).limit(self.RELEVANT_FILE_LIMIT)
+            
+            for file in files:
+                file.pop("score", None)
+                relevant_files.append(file)
+        except Exception as e:
+            self.logger.error(f"Error searching for files matching {keywords}: {str(e)}")
         
-        # If no relevant files found, try to get some common important files
-        if not relevant_files:
-            common_files = ["README.md", "setup.py", "requirements.txt", "package.json", "main.py", "app.py", "index.js"]
-            for file_name in common_files:
-                try:
-                    file = self.db_client.db.files.find_one({
-                        "repo_id": repo_id,
-                        "path": {"$regex": file_name + "$", "$options": "i"}
-                    }, {"path": 1, "summary": 1, "language": 1, "content": 1, "_id": 0})
-                    
-                    if file and file not in relevant_files:
-                        # Add the file content but limit its size
-                        if "content" in file and file["content"]:
-                            # Truncate content to avoid token limits
-                            file["content"] = file["content"][:MAX_TOKENS//10]
-                        relevant_files.append(file)
-                except Exception as e:
-                    self.logger.error(f"Error searching for common file {file_name}: {str(e)}")
+        try:
+            functions = list(self.db_client.db.functions.find(
+                {"repo_id": repo_id, "$text": search},
+                {"file_path": 1, "name": 1, "description": 1, "code": 1, "_id": 0, "score": score}
+            ).sort([("score", score)]).limit(self.RELEVANT_FUNCTION_LIMIT))
+            
+            files_by_path = {file["path"]: file for file in relevant_files}
+            missing_paths = [
+                func["file_path"] for func in functions
+                if func.get("file_path") and func["file_path"] not in files_by_path
+            ]
+            
+            # Fetch the files of the matched functions in a single query
+            if missing_paths:
+                for file in self.db_client.db.files.find(
+                    {"repo_id": repo_id, "path": {"$in": missing_paths}},
+                    {"path": 1, "summary": 1, "language": 1, "_id": 0}
+                ):
+                    files_by_path[file["path"]] = file
+                    relevant_files.append(file)
+            
+            # Attach each function to its file
+            for func in functions:
+                func.pop("score", None)
+                file = files_by_path.get(func.get("file_path", ""))
+                if file is not None:
+                    file.setdefault("functions", []).append(func)
+        except Exception as e:
+            self.logger.error(f"Error searching for functions matching {keywords}: {str(e)}")
         
         return relevant_files
     
-    def _extract_keywords(self, query: str) -> List[str]:
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _extract_keywords(query: str) -> Tuple[str, ...]:
         """
         Extract keywords from the query.
         
+        Memoized, since retried and repeated queries are common; the result is
+        a tuple so callers cannot change the cached value.
+        
         Args:
             query: User query
             
         Returns:
-            list: Keywords from the query
+            tuple: Keywords from the query
         """
         # Remove common stop words
-        stop_words = {"the", "a", "an", "in", "on", "at", "is", "are", "was", "were", "and", "or", "but", "of", "for", "with", "about", "to", "from"}
         words = query.lower().split()
-        keywords = [word for word in words if word not in stop_words and len(word) > 2]
+        keywords = [word for word in words if word not in _STOP_WORDS and len(word) > 2]
         
         # Extract quoted phrases
-        quoted_phrases = re.findall(r'"([^"]*)"', query)
+        quoted_phrases = _QUOTED_RE.findall(query)
         
         # Extract file extensions and potential file names
         file_extensions = [word for word in words if word.startswith('.') and len(word) > 1]
         potential_files = [word for word in words if '.' in word and not word.startswith('.') and not word.endswith('.')]
         
-        return keywords + quoted_phrases + file_extensions + potential_files
+        return tuple(keywords + quoted_phrases + file_extensions + potential_files)
+    
+    def _keyword_signature(self, query: str) -> Tuple[str, ...]:
+        """
+        Reduce a query to its normalized keywords, in the order it names them.
+        
+        Args:
+            query: User query
+            
+        Returns:
+            tuple: Distinct keywords without surrounding punctuation, plus any
+                contrast words ("not", "but") that keyword extraction drops
+        """
+        keywords = {keyword.lower().strip("?!,;:'\"()").rstrip(".") for keyword in self._extract_keywords(query)}
+        keywords.discard("")
+        words = (word.lower().strip("?!,;:'\"()").rstrip(".") for word in query.split())
+        ordered = dict.fromkeys(word for word in words if word in keywords or word in CONTRAST_WORDS)
+        # Quoted phrases span several words, so they follow the single words
+        return tuple(ordered) + tuple(sorted(keywords.difference(ordered)))
+    
+    def _identifier_signature(self, query: str) -> Tuple[str, ...]:
+        """
+        Collect the code identifiers a query names.
+        
+        Args:
+            query: User query
+            
+        Returns:
+            tuple: Distinct lowercased identifiers in query order, such as
+                repoloaderfactory or main.py
+        """
+        return tuple(dict.fromkeys(
+            word.lower().rstrip(".")
+            for word in _WORD_RE.findall(query)
+            if _IDENTIFIER_RE.fullmatch(word.rstrip("."))
+        ))
     
     def _build_prompt(self, query: str, repo: Dict[str, Any], context: Dict[str, Any]) -> str:
         """
@@ -302,7 +554,11 @@ class QueryProcessor:
         repo_name = repo.get('name', 'Unknown Repository')
         repo_summary = context.get('repo_summary', 'No summary available')
         
-        prompt = f"""
+        # Token budget of each context section
+        budget = MAX_TOKENS - self.RESPONSE_TOKENS
+        section_budgets = {section: int(budget * share) for section, share in self.PROMPT_TOKEN_SHARES.items()}
+        
+        parts = [f"""
         You are RepoMind, an AI assistant specialized in analyzing and explaining code repositories.
         
         Repository: {repo_name}
@@ -310,70 +566,82 @@ class QueryProcessor:
         
         User Query: {query}
         
-        """
+        """]
         
         # Add all available files list for reference
         if "all_files" in context and context["all_files"]:
-            prompt += "\nFiles in this repository:\n"
-            for file_path in context["all_files"][:50]:  # Limit to 50 files to avoid token issues
-                prompt += f"- {file_path}\n"
+            file_lines = ["\nFiles in this repository:\n"]
+            listed_files = context["all_files"][:self.PROMPT_FILE_LIMIT]  # Limit files to avoid token issues
+            for file_path in listed_files:
+                file_lines.append(f"- {file_path}\n")
             
-            if len(context["all_files"]) > 50:
-                prompt += f"... and {len(context['all_files']) - 50} more files\n"
+            file_count = max(context.get("file_count", 0), len(context["all_files"]))
+            if file_count > len(listed_files):
+                file_lines.append(f"... and {file_count - len(listed_files)} more files\n")
+            parts.append(_truncate_tokens("".join(file_lines), section_budgets["all_files"]))
         
         # Add current file context if available
         if "current_file" in context:
             file = context["current_file"]
-            prompt += f"""
+            content_budget = section_budgets["current_file"] - _count_tokens(file.get('summary', ''))
+            parts.append(f"""
             Current File: {file.get('path', '')}
             Language: {file.get('language', '')}
             File Summary: {file.get('summary', '')}
             
             File Content:
             ```{file.get('language', '')}
-            {file.get('content', '')[:MAX_TOKENS//4]}  # Limit content to avoid token limits
+            {_truncate_tokens(file.get('content', ''), content_budget)}  # Limit content to avoid token limits
             ```
             
-            """
+            """)
         
         # Add relevant files
         if "relevant_files" in context and context["relevant_files"]:
-            prompt += "\nRelevant Files:\n"
+            parts.append("\nRelevant Files:\n")
+            file_budget = section_budgets["relevant_files"] // len(context["relevant_files"])
             for file in context["relevant_files"]:
                 file_path = file.get('path', 'Unknown file')
                 file_summary = file.get('summary', 'No summary available')
                 file_language = file.get('language', '')
                 file_content = file.get('content', '')
                 
-                prompt += f"--- File: {file_path} ---\n"
-                prompt += f"Language: {file_language}\n"
-                prompt += f"Summary: {file_summary}\n"
-                
-                # Add truncated content
-                if file_content:
-                    prompt += f"Content snippet:\n```{file_language}\n{file_content[:MAX_TOKENS//5]}\n```\n"
+                file_parts = [
+                    f"--- File: {file_path} ---\n",
+                    f"Language: {file_language}\n",
+                    f"Summary: {file_summary}\n",
+                ]
                 
                 # Add functions in this file if available
+                function_parts = []
                 if "functions" in file and file["functions"]:
-                    prompt += "Functions in this file:\n"
+                    function_parts.append("Functions in this file:\n")
                     for func in file["functions"][:3]:  # Limit to 3 functions per file
-                        prompt += f"- {func.get('name', '')}: {func.get('description', '')[:100]}...\n"
+                        function_parts.append(f"- {func.get('name', '')}: {func.get('description', '')[:100]}...\n")
                     
                     if len(file["functions"]) > 3:
-                        prompt += f"... and {len(file['functions']) - 3} more functions\n"
+                        function_parts.append(f"... and {len(file['functions']) - 3} more functions\n")
+                
+                # Content gets whatever the file's budget leaves after its metadata
+                if file_content:
+                    content_budget = file_budget - _count_tokens("".join(file_parts + function_parts))
+                    file_parts.append(f"Content snippet:\n```{file_language}\n{_truncate_tokens(file_content, content_budget)}\n```\n")
                 
-                prompt += "\n"
+                parts.extend(file_parts)
+                parts.extend(function_parts)
+                parts.append("\n")
         
         # Add functions if available
         if "functions" in context and context["functions"]:
-            prompt += "\nRelevant Functions:\n"
+            function_lines = ["\nRelevant Functions:\n"]
             for func in context["functions"][:5]:  # Limit to 5 functions
-                prompt += f"- {func.get('name', '')}: {func.get('description', '')[:100]}...\n"
+                function_lines.append(f"- {func.get('name', '')}: {func.get('description', '')[:100]}...\n")
             
             if len(context["functions"]) > 5:
-                prompt += f"... and {len(context['functions']) - 5} more functions\n"
+                function_lines.append(f"... and {len(context['functions']) - 5} more functions\n")
+            parts.append(_truncate_tokens("".join(function_lines), section_budgets["functions"]))
         
-        prompt += """
+        parts.append("""
         Please provide a detailed, informative response to the user's query based on the repository context provided.
         If you don't have enough information to answer the query, please acknowledge this limitation instead of speculating.
         If the query asks for code, include relevant, well-structured code snippets.
@@ -389,9 +657,9 @@ class QueryProcessor:
         
         REFERENCES:
         <list of specific files or functions referenced in your answer>
-        """
+        """)
         
-        return prompt
+        return "".join(parts)
     
     def _parse_response(self, response: str) -> Dict[str, Any]:
         """
@@ -409,19 +677,19 @@ class QueryProcessor:
         confidence = 0.9  # Default confidence
         
         # Extract answer
-        answer_match = re.search(r'ANSWER:(.*?)(?:CODE:|REFERENCES:|$)', response, re.DOTALL)
+        answer_match = _ANSWER_RE.search(response)
         if answer_match:
             text = answer_match.group(1).strip()
         else:
             text = response.strip()
         
         # Extract code
-        code_match = re.search(r'CODE.*?:\s*```.*?\n(.*?)```', response, re.DOTALL)
+        code_match = _CODE_RE.search(response)
         if code_match:
             code = code_match.group(1).strip()
         
         # Extract references
-        refs_match = re.search(r'REFERENCES:(.*?)$', response, re.DOTALL)
+        refs_match = _REFS_RE.search(response)
         if refs_match:
             refs_text = refs_match.group(1).strip()
             referenced_files = [ref.strip() for ref in refs_text.split('\n') if ref.strip()]
@@ -433,6 +701,19 @@ class QueryProcessor:
             "confidence": confidence
         }
     
+    def _save_query_in_background(self, repo_id: str, query: str, response: Dict[str, Any]) -> None:
+        """
+        Save the query and response without making the caller wait for the write.
+        
+        Args:
+            repo_id: Repository ID
+            query: User query
+            response: Processed response
+        """
+        task = asyncio.create_task(asyncio.to_thread(self._save_query, repo_id, query, response))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+    
     def _save_query(self, repo_id: str, query: str, response: Dict[str, Any]) -> None:
         """
         Save the query and response to the database.
@@ -447,7 +728,7 @@ class QueryProcessor:
                 "repo_id": repo_id,
                 "query": query,
                 "response": response,
-                "timestamp": self.db_client.db.client.server_info().get("localTime", None)
+                "timestamp": datetime.now(timezone.utc)
             }
             
             self.db_client.db.queries.insert_one(query_doc)
@@ -467,10 +748,12 @@ class QueryProcessor:
             list: Query history
         """
         try:
-            queries = list(self.db_client.db.queries.find(
+            # Pin the plan to the history index so the sort never falls back to a scan
+            cursor = self.db_client.db.queries.find(
                 {"repo_id": repo_id},
                 {"query": 1, "response": 1, "timestamp": 1, "_id": 0}
-            ).sort("timestamp", -1).limit(limit))
+            ).sort("timestamp", -1).limit(limit).hint(QUERY_HISTORY_INDEX)
+            queries = await asyncio.to_thread(list, cursor)
             
             return queries
             
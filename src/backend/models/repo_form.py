@@ -1,6 +1,6 @@
 from typing import Optional
 from fastapi import UploadFile
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class BaseRepoForm(BaseModel):
@@ -17,14 +17,13 @@ class GitHubRepoForm(BaseRepoForm):
     """
     url: str
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "type": "github",
-                "name": "flask",
-                "url": "https://github.com/pallets/flask"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "type": "github",
+            "name": "flask",
+            "url": "https://github.com/pallets/flask"
         }
+    })
 
 
 class LocalRepoForm(BaseRepoForm):
@@ -33,12 +32,13 @@ class LocalRepoForm(BaseRepoForm):
     """
     file: UploadFile
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "type": "local",
                 "name": "my-project",
                 "file": "file_content"
             }
-        }
-        arbitrary_types_allowed = True 
\ No newline at end of file
+        },
+        arbitrary_types_allowed=True
+    ) 
\ No newline at end of file
@@ -1,7 +1,7 @@
 from typing import Optional, Dict, List, Any
-from datetime import datetime
+from datetime import datetime, timezone
 import os
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, field_serializer
 
 
 class Repository(BaseModel):
@@ -14,16 +14,15 @@ class Repository(BaseModel):
     url: Optional[str] = None
     local_path: Optional[str] = None
     status: str = "processing"
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     summary: Optional[str] = None
     metrics: Optional[Dict[str, Any]] = None
     
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {
-            datetime: lambda dt: dt.isoformat()
-        }
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
+    
+    @field_serializer("created_at", when_used="json")
+    def _serialize_created_at(self, created_at: datetime) -> str:
+        return created_at.isoformat()
     
     def get_local_path(self) -> str:
         """
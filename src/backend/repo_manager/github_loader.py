@@ -7,6 +7,7 @@ import os
 import re
 import tempfile
 import logging
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any, Optional, Tuple
 import git
@@ -19,6 +20,36 @@ from config import TEMP_DIR
 # Fix circular import
 # from src.backend.repo_manager.repo_loader import RepoLoader, RepoLoaderFactory
 from src.backend.repo_manager.repo_loader_factory import RepoLoaderFactory
+from src.backend.code_analyzer.language_detector import LanguageDetector
+from src.backend.database.cache import TTLCache
+
+# Shared session, so repeated validations reuse the pooled TLS connection
+_SESSION = requests.Session()
+
+# Seconds to wait for GitHub when validating a URL
+VALIDATE_TIMEOUT = 5
+
+# Existence checks by URL (found or not found only); results expire so deleted
+# or created repositories are noticed
+_validated_urls = TTLCache(maxsize=1024, ttl=300.0)
+
+# Repository URLs: owner and name, with an optional .git suffix and trailing slash
+_GITHUB_URL_RE = re.compile(r"^https?://github\.com/([^/]+)/([^/]+?)(?:\.git)?/?$")
+
+
+@lru_cache(maxsize=1024)
+def _parse_github_url(url: str) -> Optional[Tuple[str, str]]:
+    """
+    Split a GitHub repository URL into its owner and repository name.
+    
+    Args:
+        url: GitHub repository URL
+        
+    Returns:
+        tuple: (owner, repository name), or None if the URL is not a repository URL
+    """
+    match = _GITHUB_URL_RE.match(url.strip())
+    return match.groups() if match else None
 
 
 # Base class definition to avoid circular import
@@ -39,17 +70,19 @@ class BaseRepoLoader:
         Returns:
             bool: True if binary, False otherwise
         """
-        # Common binary file extensions
-        binary_extensions = {
-            '.pyc', '.so', '.o', '.a', '.lib', '.dll', '.exe', '.bin',
-            '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.ico', '.tif', '.tiff',
-            '.zip', '.tar', '.gz', '.bz2', '.xz', '.rar', '.7z',
-            '.pdf', '.doc', '.docx', '.ppt', '.pptx', '.xls', '.xlsx',
-            '.db', '.sqlite', '.db3',
-        }
-        
+        # Known extensions answer without touching the file
+        if LanguageDetector.is_binary_path(file_path):
+            return True
         _, ext = os.path.splitext(file_path.lower())
-        return ext in binary_extensions
+        if ext in LanguageDetector.EXTENSION_MAP:
+            return False
+        
+        # Unknown extensions: look for a NUL byte near the start
+        try:
+            with open(file_path, 'rb') as f:
+                return LanguageDetector.looks_binary(f.read(8192))
+        except OSError:
+            return False
 
 
 @RepoLoaderFactory.register("github")
@@ -75,32 +108,51 @@ class GitHubLoader:
             bool: True if valid, False otherwise
         """
         try:
-            if not url.startswith(("http://github.com/", "https://github.com/")):
+            parsed = _parse_github_url(url)
+            if not parsed:
                 return False
-                
-            # Extract owner and repo name
-            parts = url.strip("/").split("/")
-            if len(parts) < 5:
-                return False
-                
-            owner = parts[-2]
-            repo = parts[-1]
+            owner, repo = parsed
+            
+            cached = _validated_urls.get(url)
+            if cached is not None:
+                return cached
             
-            # Validate that repo exists
-            response = requests.head(f"https://github.com/{owner}/{repo}")
-            return response.status_code == 200
+            # Validate that repo exists; renamed repositories redirect to their new name
+            response = _SESSION.head(f"https://github.com/{owner}/{repo}", timeout=VALIDATE_TIMEOUT, 
+                                     allow_redirects=True)
+            valid = response.status_code == 200
+            # Only definite answers are cached; rate limits and server errors are retried
+            if response.status_code in (200, 404):
+                _validated_urls.set(url, valid)
+            return valid
             
         except Exception as e:
             self.logger.error(f"Error validating GitHub URL: {str(e)}")
             return False
     
-    def load(self, url: str, target_dir: str = None) -> Dict[str, Any]:
+    def _checkout_text_files(self, git_repo: git.Repo) -> None:
+        """
+        Check out a cloned repository, leaving out files that are binary by extension.
+        
+        Args:
+            git_repo: Repository cloned with --no-checkout
+        """
+        # Non-cone patterns: everything, minus the binary extensions in either case
+        patterns = ["/*"]
+        for ext in sorted(LanguageDetector.BINARY_EXTENSIONS):
+            patterns += [f"!*{ext}", f"!*{ext.upper()}"]
+        
+        git_repo.git.sparse_checkout("set", "--no-cone", *patterns)
+        git_repo.git.checkout()
+    
+    def load(self, url: str, target_dir: str = None, branch: Optional[str] = None) -> Dict[str, Any]:
         """
         Load a GitHub repository
         
         Args:
             url: GitHub repository URL
             target_dir: Target directory for cloning
+            branch: Optional branch to clone instead of the default one
             
         Returns:
             dict: Repository data
@@ -109,17 +161,27 @@ class GitHubLoader:
             self.logger.info(f"Loading GitHub repository from {url}")
             
             # Extract owner and repo name
-            parts = url.strip("/").split("/")
-            owner = parts[-2]
-            repo_name = parts[-1]
+            parsed = _parse_github_url(url)
+            if not parsed:
+                raise ValueError(f"Invalid GitHub URL: {url}")
+            owner, repo_name = parsed
             
             # Create temporary directory if not provided
             if not target_dir:
-                target_dir = tempfile.mkdtemp()
+                target_dir = tempfile.mkdtemp(prefix="repo_", dir=TEMP_DIR)
             
-            # Clone repository
+            # Clone only the latest commit of a single branch, without tags;
+            # history is never analyzed. Blobs are left on the server until
+            # checkout, which skips binaries. No shell is involved, so the URL
+            # and branch cannot inject commands
             clone_url = f"https://github.com/{owner}/{repo_name}.git"
-            os.system(f"git clone {clone_url} {target_dir}")
+            clone_kwargs = {"branch": branch} if branch else {}
+            git_repo = git.Repo.clone_from(
+                clone_url, target_dir,
+                multi_options=["--depth=1", "--single-branch", "--no-tags", "--filter=blob:none", "--no-checkout"],
+                **clone_kwargs
+            )
+            self._checkout_text_files(git_repo)
             
             # Get repository info
             g = Github()
@@ -139,6 +201,9 @@ class GitHubLoader:
             
             return repo_data
             
+        except GitCommandError as e:
+            self.logger.error(f"Git clone failed: {str(e)}")
+            raise ValueError(f"Could not clone {url}") from e
         except GithubException as e:
             self.logger.error(f"GitHub API error: {str(e)}")
             raise
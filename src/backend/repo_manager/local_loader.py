@@ -4,13 +4,69 @@ Handles loading repositories from local file system.
 """
 
 import os
+import contextlib
 import logging
 import shutil
 import tempfile
 from pathlib import Path
-from typing import Dict, Any, BinaryIO
+from typing import Dict, Any, BinaryIO, Iterator
 
+from config import TEMP_DIR, MAX_REPO_SIZE_MB, UPLOAD_BUFFER_SIZE
 from src.backend.repo_manager.repo_loader import RepoLoader, RepoLoaderFactory
+from src.backend.analyzer.repo_analyzer import SKIPPED_DIRS
+
+
+def _iter_files(root: str) -> Iterator[os.DirEntry]:
+    """
+    Yield every regular file under a directory, without following symlinks.
+    
+    Directories the analyzer never reads (.git, node_modules, virtualenvs)
+    are pruned, so they do not count towards the repository size.
+    
+    Args:
+        root: Directory to walk
+        
+    Returns:
+        Iterator: Directory entries of the files
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIPPED_DIRS:
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+        except OSError:
+            # Unreadable directories are skipped
+            continue
+
+
+def _stage_upload(file_object: BinaryIO, destination: str) -> None:
+    """
+    Save an uploaded file, copying in the kernel when it is already on disk.
+    
+    Args:
+        file_object: Uploaded file, or a form upload wrapping one
+        destination: Path to save the file to
+    """
+    # Form uploads wrap the file in an async interface; use the file itself
+    source = getattr(file_object, "file", file_object)
+    
+    # Files with a path copy via sendfile/copy_file_range, never through user space
+    name = getattr(source, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        try:
+            shutil.copyfile(name, destination)
+            return
+        except OSError:
+            pass
+    
+    with open(destination, "wb", buffering=UPLOAD_BUFFER_SIZE) as f:
+        shutil.copyfileobj(source, f, length=UPLOAD_BUFFER_SIZE)
 
 
 @RepoLoaderFactory.register("local")
@@ -24,6 +80,7 @@ class LocalLoader:
         Initialize the local loader
         """
         self.logger = logging.getLogger(__name__)
+        self.max_size_bytes = MAX_REPO_SIZE_MB * 1024 * 1024
     
     def validate(self, path: str) -> bool:
         """
@@ -33,9 +90,21 @@ class LocalLoader:
             path: Local path
             
         Returns:
-            bool: True if valid, False otherwise
+            bool: True if it is a directory whose analyzed files are within the
+                repository size limit, False otherwise
         """
-        return os.path.exists(path) and os.path.isdir(path)
+        if not os.path.isdir(path):
+            return False
+        
+        # Directory entries carry the stat results, and the walk stops as
+        # soon as the limit is passed
+        total_size = 0
+        for entry in _iter_files(path):
+            total_size += entry.stat(follow_symlinks=False).st_size
+            if total_size > self.max_size_bytes:
+                self.logger.warning(f"Local repository exceeds {MAX_REPO_SIZE_MB}MB: {path}")
+                return False
+        return True
     
     def load(self, file_object: BinaryIO, target_dir: str = None) -> Dict[str, Any]:
         """
@@ -53,21 +122,22 @@ class LocalLoader:
             
             # Create target directory if not provided
             if not target_dir:
-                target_dir = tempfile.mkdtemp()
+                target_dir = tempfile.mkdtemp(prefix="repo_", dir=TEMP_DIR)
             
             # Save uploaded file
             temp_file = os.path.join(target_dir, "upload.zip")
-            with open(temp_file, "wb") as f:
-                shutil.copyfileobj(file_object, f)
-            
-            # Extract file if it's a zip
-            if temp_file.endswith(".zip"):
-                import zipfile
-                with zipfile.ZipFile(temp_file, "r") as zip_ref:
-                    zip_ref.extractall(target_dir)
+            try:
+                _stage_upload(file_object, temp_file)
                 
-                # Remove zip file
-                os.remove(temp_file)
+                # Extract file if it's a zip
+                if temp_file.endswith(".zip"):
+                    import zipfile
+                    with zipfile.ZipFile(temp_file, "r") as zip_ref:
+                        zip_ref.extractall(target_dir)
+            finally:
+                # Remove zip file, even when saving or extracting failed
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(temp_file)
             
             # Get repository info
             repo_name = os.path.basename(target_dir)
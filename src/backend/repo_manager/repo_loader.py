@@ -3,13 +3,16 @@ Repository loading interface.
 Handles loading repositories from different sources (GitHub, ZIP, local).
 """
 
+import asyncio
 import os
 import uuid
 import logging
 import tempfile
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from bson import ObjectId
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import partial
+from config import TEMP_DIR
 
 # Remove circular imports
 # from src.backend.repo_manager.github_loader import GitHubLoader
@@ -18,11 +21,18 @@ from datetime import datetime
 
 # Import the factory
 from src.backend.repo_manager.repo_loader_factory import RepoLoaderFactory
+from src.backend.database.db_client import file_name_key
+
+# Bound once; called for every stored repository, always timezone-aware UTC
+_utcnow = partial(datetime.now, timezone.utc)
 
 
 class RepoLoader:
     """Repository loader class for loading repositories from various sources."""
     
+    # File documents sent to MongoDB per insert round trip
+    FILE_INSERT_BATCH_SIZE = 1000
+    
     def __init__(self, db_client=None):
         """
         Initialize the repository loader.
@@ -50,35 +60,31 @@ class RepoLoader:
             self.logger.info(f"Loading repository from GitHub: {github_url}")
             
             # Use the factory to get the GitHub loader
-            github_loader_class = RepoLoaderFactory.get_loader("github")
-            if not github_loader_class:
+            github_loader = RepoLoaderFactory.get_loader_instance("github")
+            if not github_loader:
                 raise ValueError(f"GitHub loader not found")
-                
-            github_loader = github_loader_class()
             
             # Validate GitHub URL
-            if not github_loader.validate(github_url):
+            if not await asyncio.to_thread(github_loader.validate, github_url):
                 raise ValueError(f"Invalid GitHub URL: {github_url}")
             
             # Create temporary directory
-            temp_dir = tempfile.mkdtemp()
+            temp_dir = tempfile.mkdtemp(prefix="repo_", dir=TEMP_DIR)
             
-            # Load repository data
-            repo_data = github_loader.load(github_url, temp_dir)
+            # Load repository data off the event loop, building the whole document at once
+            repo_id = str(ObjectId())
+            repo_data = {
+                **await asyncio.to_thread(github_loader.load, github_url, temp_dir, branch),
+                "_id": repo_id,
+                "status": "processing"
+            }
             
             # Set repository name if provided
             if name:
                 repo_data["name"] = name
             
-            # Generate repository ID
-            repo_id = str(ObjectId())
-            
-            # Add metadata
-            repo_data["_id"] = repo_id
-            repo_data["status"] = "processing"
-            
             # Store in database
-            self.db_client.db.repositories.insert_one(repo_data)
+            await asyncio.to_thread(self.db_client.db.repositories.insert_one, repo_data)
             self.logger.info(f"Repository stored in database with ID {repo_id}")
             
             return repo_id
@@ -102,33 +108,29 @@ class RepoLoader:
             self.logger.info(f"Loading repository from ZIP: {zip_file.filename}")
             
             # Use the factory to get the ZIP loader
-            zip_loader_class = RepoLoaderFactory.get_loader("zip")
-            if not zip_loader_class:
+            zip_loader = RepoLoaderFactory.get_loader_instance("zip")
+            if not zip_loader:
                 raise ValueError(f"ZIP loader not found")
-                
-            zip_loader = zip_loader_class()
             
             # Create temporary directory
-            temp_dir = tempfile.mkdtemp()
+            temp_dir = tempfile.mkdtemp(prefix="repo_", dir=TEMP_DIR)
             
-            # Load repository data
-            repo_data = zip_loader.load(zip_file, temp_dir)
+            # Load repository data off the event loop, building the whole document at once
+            repo_id = str(ObjectId())
+            repo_data = {
+                **await asyncio.to_thread(zip_loader.load, zip_file, temp_dir, zip_file.filename),
+                "_id": repo_id,
+                "status": "processing",
+                "source_type": "ZIP",
+                "created_at": _utcnow()
+            }
             
             # Set repository name if provided
             if name:
                 repo_data["name"] = name
             
-            # Generate repository ID
-            repo_id = str(ObjectId())
-            
-            # Add metadata
-            repo_data["_id"] = repo_id
-            repo_data["status"] = "processing"
-            repo_data["source_type"] = "ZIP"
-            repo_data["created_at"] = datetime.utcnow()
-            
             # Store in database
-            self.db_client.db.repositories.insert_one(repo_data)
+            await asyncio.to_thread(self.db_client.db.repositories.insert_one, repo_data)
             self.logger.info(f"Repository stored in database with ID {repo_id}")
             
             return repo_id
@@ -152,34 +154,30 @@ class RepoLoader:
             self.logger.info(f"Loading repository from local path: {local_path}")
             
             # Use the factory to get the local loader
-            local_loader_class = RepoLoaderFactory.get_loader("local")
-            if not local_loader_class:
+            local_loader = RepoLoaderFactory.get_loader_instance("local")
+            if not local_loader:
                 raise ValueError(f"Local loader not found")
-                
-            local_loader = local_loader_class()
             
             # Validate local path
-            if not local_loader.validate(local_path):
+            if not await asyncio.to_thread(local_loader.validate, local_path):
                 raise ValueError(f"Invalid local path: {local_path}")
             
-            # Load repository data
-            repo_data = local_loader.load(local_path)
+            # Load repository data off the event loop, building the whole document at once
+            repo_id = str(ObjectId())
+            repo_data = {
+                **await asyncio.to_thread(local_loader.load, local_path),
+                "_id": repo_id,
+                "status": "processing",
+                "source_type": "Local",
+                "created_at": _utcnow()
+            }
             
             # Set repository name if provided
             if name:
                 repo_data["name"] = name
             
-            # Generate repository ID
-            repo_id = str(ObjectId())
-            
-            # Add metadata
-            repo_data["_id"] = repo_id
-            repo_data["status"] = "processing"
-            repo_data["source_type"] = "Local"
-            repo_data["created_at"] = datetime.utcnow()
-            
             # Store in database
-            self.db_client.db.repositories.insert_one(repo_data)
+            await asyncio.to_thread(self.db_client.db.repositories.insert_one, repo_data)
             self.logger.info(f"Repository stored in database with ID {repo_id}")
             
             return repo_id
@@ -188,39 +186,32 @@ class RepoLoader:
             self.logger.error(f"Error loading repository from local path: {str(e)}")
             raise
     
-    async def _process_files(self, repo_id: str, files: Dict[str, Any]) -> None:
+    async def _process_files(self, repo_id: str, files: List[Dict[str, Any]]) -> None:
         """
         Process files and store them in the database.
         
         Args:
             repo_id: Repository ID
-            files: Dictionary of files
+            files: File records, each with a "path" key
         """
         try:
-            # Store files in the database
-            batch_size = 50
-            file_entries = []
-            
-            for path, file_data in files.items():
-                file_entry = {
+            file_entries = [
+                {
                     "repo_id": repo_id,
-                    "path": path,
+                    "path": file_data["path"],
+                    "name_lc": file_name_key(file_data["path"]),
                     "content": file_data.get("content", ""),
                     "size_bytes": file_data.get("size_bytes", 0),
                     "line_count": file_data.get("line_count", 0)
                 }
-                
-                file_entries.append(file_entry)
-                
-                # Insert in batches to avoid memory issues
-                if len(file_entries) >= batch_size:
-                    if file_entries:
-                        self.db_client.db.files.insert_many(file_entries)
-                    file_entries = []
-            
-            # Insert remaining files
-            if file_entries:
-                self.db_client.db.files.insert_many(file_entries)
+                for file_data in files
+            ]
+            
+            # Unordered inserts keep going past files that are already stored;
+            # the unique (repo_id, path) index turns those into upserts
+            if not self.db_client.bulk_insert("files", file_entries, keys=("repo_id", "path"),
+                                              chunk_size=self.FILE_INSERT_BATCH_SIZE):
+                raise RuntimeError(f"Failed to store files for repository {repo_id}")
                 
         except Exception as e:
             self.logger.error(f"Error processing repository files: {str(e)}")
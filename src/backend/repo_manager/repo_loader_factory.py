@@ -11,6 +11,9 @@ class RepoLoaderFactory:
     
     _loaders: Dict[str, Type[Any]] = {}
     
+    # Loaders keep no per-load state, so one instance per type is shared
+    _instances: Dict[str, Any] = {}
+    
     @classmethod
     def register(cls, loader_type: str) -> Callable:
         """
@@ -24,6 +27,7 @@ class RepoLoaderFactory:
         """
         def decorator(loader_class: Type[Any]) -> Type[Any]:
             cls._loaders[loader_type] = loader_class
+            cls._instances.pop(loader_type, None)
             return loader_class
         return decorator
     
@@ -42,4 +46,23 @@ class RepoLoaderFactory:
             logging.error(f"Loader type not found: {loader_type}")
             return None
             
-        return cls._loaders.get(loader_type) 
\ No newline at end of file
+        return cls._loaders.get(loader_type)
+    
+    @classmethod
+    def get_loader_instance(cls, loader_type: str) -> Optional[Any]:
+        """
+        Get the shared loader instance for a type, creating it on first use.
+        
+        Args:
+            loader_type: Type of loader
+            
+        Returns:
+            Any: Loader instance or None if not found
+        """
+        loader = cls._instances.get(loader_type)
+        if loader is None:
+            loader_class = cls.get_loader(loader_type)
+            if loader_class is None:
+                return None
+            loader = cls._instances[loader_type] = loader_class()
+        return loader 
\ No newline at end of file
@@ -5,14 +5,35 @@ Handles loading repositories from ZIP files.
 
 import os
 import zipfile
+import contextlib
 import tempfile
 import logging
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, BinaryIO
+from typing import Dict, Any, BinaryIO, Tuple
 
-from config import TEMP_DIR
+from config import TEMP_DIR, MAX_FILE_SIZE_MB, MAX_REPO_SIZE_MB, UPLOAD_BUFFER_SIZE
 from src.backend.repo_manager.repo_loader import RepoLoader, RepoLoaderFactory
+from src.backend.code_analyzer.language_detector import LanguageDetector
+
+
+@lru_cache(maxsize=32)
+def _read_central_directory(path: str, mtime_ns: int, size: int) -> Tuple[zipfile.ZipInfo, ...]:
+    """
+    List the members of a ZIP file, reusing the listing until the file changes.
+    
+    Args:
+        path: Path to the ZIP file
+        mtime_ns: Modification time of the file, part of the cache key
+        size: Size of the file, part of the cache key
+        
+    Returns:
+        tuple: Member entries from the central directory
+    """
+    with zipfile.ZipFile(path) as zf:
+        return tuple(zf.infolist())
 
 
 @RepoLoaderFactory.register("zip")
@@ -21,11 +42,19 @@ class ZipLoader:
     ZIP repository loader
     """
     
+    # Uploads that cannot seek are spooled, in memory up to this size
+    SPOOL_MAX_SIZE = 64 * 1024 * 1024
+    
+    # Threads extracting members at once
+    EXTRACT_WORKERS = min(32, (os.cpu_count() or 4) * 2)
+    
     def __init__(self):
         """
         Initialize the ZIP loader
         """
         self.logger = logging.getLogger(__name__)
+        self.max_file_size_bytes = MAX_FILE_SIZE_MB * 1024 * 1024
+        self.max_size_bytes = MAX_REPO_SIZE_MB * 1024 * 1024
     
     def validate(self, file_path: str) -> bool:
         """
@@ -37,25 +66,31 @@ class ZipLoader:
         Returns:
             bool: True if valid, False otherwise
         """
-        if not os.path.isfile(file_path):
-            return False
-            
         if not file_path.lower().endswith(".zip"):
             return False
             
         try:
-            with zipfile.ZipFile(file_path) as zf:
-                return True
-        except zipfile.BadZipFile:
+            stat_result = os.stat(file_path)
+            # Sizes come from the central directory; no member is decompressed
+            members = _read_central_directory(file_path, stat_result.st_mtime_ns, stat_result.st_size)
+        except (OSError, zipfile.BadZipFile):
+            return False
+        
+        total_size = sum(info.file_size for info in members)
+        
+        if total_size > self.max_size_bytes:
+            self.logger.warning(f"ZIP repository exceeds {MAX_REPO_SIZE_MB}MB when extracted: {file_path}")
             return False
+        return True
     
-    def load(self, file_object: BinaryIO, target_dir: str = None) -> Dict[str, Any]:
+    def load(self, file_object: BinaryIO, target_dir: str = None, filename: str = "unknown") -> Dict[str, Any]:
         """
         Load a repository from a ZIP file
         
         Args:
             file_object: File object (usually from a form upload)
             target_dir: Target directory
+            filename: Name of the uploaded file
             
         Returns:
             dict: Repository data
@@ -65,19 +100,23 @@ class ZipLoader:
             
             # Create target directory if not provided
             if not target_dir:
-                target_dir = tempfile.mkdtemp()
+                target_dir = tempfile.mkdtemp(prefix="repo_", dir=TEMP_DIR)
             
-            # Save uploaded file
-            temp_file = os.path.join(target_dir, "upload.zip")
-            with open(temp_file, "wb") as f:
-                shutil.copyfileobj(file_object, f)
-            
-            # Extract ZIP file
-            with zipfile.ZipFile(temp_file, "r") as zip_ref:
-                zip_ref.extractall(target_dir)
-            
-            # Clean up the uploaded file
-            os.remove(temp_file)
+            # Read the archive straight from the upload when it can seek;
+            # otherwise spool it, in memory unless it is large
+            with contextlib.ExitStack() as stack:
+                # Form uploads wrap the file in an async interface; read the
+                # file itself, since this runs off the event loop
+                archive = getattr(file_object, "file", file_object)
+                if not (hasattr(archive, "seekable") and archive.seekable()):
+                    upload = archive
+                    archive = stack.enter_context(tempfile.SpooledTemporaryFile(max_size=self.SPOOL_MAX_SIZE))
+                    shutil.copyfileobj(upload, archive, length=UPLOAD_BUFFER_SIZE)
+                archive.seek(0)
+                
+                # Extract only the members the analyzer will read
+                with zipfile.ZipFile(archive, "r") as zip_ref:
+                    self._extract_members(zip_ref, target_dir)
             
             # Get repository info
             repo_name = os.path.basename(target_dir)
@@ -87,11 +126,64 @@ class ZipLoader:
                 "name": repo_name,
                 "type": "zip",
                 "local_path": target_dir,
-                "original_file": getattr(file_object, "filename", "unknown")
+                "original_file": filename
             }
             
             return repo_data
             
+        except zipfile.BadZipFile as e:
+            # Corrupt members surface here, while being extracted
+            self.logger.error(f"Invalid ZIP file: {str(e)}")
+            raise ValueError(f"Invalid ZIP file: {str(e)}") from e
         except Exception as e:
             self.logger.error(f"Error loading ZIP repository: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+    
+    def _extract_members(self, zip_ref: zipfile.ZipFile, target_dir: str) -> None:
+        """
+        Extract the text members of an archive, several at a time
+        
+        Args:
+            zip_ref: Open archive
+            target_dir: Directory to extract into
+        """
+        root = os.path.realpath(target_dir)
+        infos = zip_ref.infolist()
+        
+        # Archives of a single top-level directory (GitHub's "repo-branch/")
+        # are extracted without it, so the repository sits at the target;
+        # only that one level is stripped, never the directories below it
+        prefix = ""
+        top_levels = {info.filename.split("/", 1)[0] for info in infos}
+        if len(top_levels) == 1 and all("/" in info.filename for info in infos):
+            top_level = top_levels.pop()
+            if top_level not in ("", ".", ".."):
+                prefix = top_level + "/"
+        
+        members = []
+        for info in infos:
+            if info.is_dir() or info.file_size > self.max_file_size_bytes:
+                continue
+            if LanguageDetector.is_binary_path(info.filename):
+                continue
+            
+            # Never write outside the target directory
+            destination = os.path.realpath(os.path.join(root, info.filename[len(prefix):]))
+            if not destination.startswith(root + os.sep):
+                self.logger.warning(f"Skipping ZIP member outside the repository: {info.filename}")
+                continue
+            members.append((info, destination))
+        
+        # Create directories up front so workers never race to make them
+        for directory in {os.path.dirname(destination) for _, destination in members}:
+            os.makedirs(directory, exist_ok=True)
+        
+        def extract(member):
+            info, destination = member
+            with zip_ref.open(info) as source, open(destination, "wb") as target:
+                shutil.copyfileobj(source, target, length=UPLOAD_BUFFER_SIZE)
+        
+        # Decompression releases the GIL, so members extract in parallel
+        with ThreadPoolExecutor(max_workers=self.EXTRACT_WORKERS) as pool:
+            # list() surfaces the first failed member
+            list(pool.map(extract, members)) 
\ No newline at end of file
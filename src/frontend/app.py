@@ -9,6 +9,7 @@ import logging
 from typing import Dict, List, Optional
 from pathlib import Path
 import httpx
+import jinja2
 
 # Add the parent directory to sys.path to make config importable
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
@@ -20,7 +21,7 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 import uvicorn
 
-from config import STATIC_DIR, TEMPLATES_DIR
+from config import STATIC_DIR, TEMPLATES_DIR, TEMP_DIR, DEBUG
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -35,18 +36,31 @@ app = FastAPI(
 router = APIRouter()
 
 # Configure templates and static files
-templates = Jinja2Templates(directory=TEMPLATES_DIR)
+# Compiled templates are cached on disk, so restarts skip parsing them;
+# outside debug mode, templates are not checked for changes on every render
+template_cache_dir = TEMP_DIR / "jinja_cache"
+os.makedirs(template_cache_dir, exist_ok=True)
+templates = Jinja2Templates(env=jinja2.Environment(
+    loader=jinja2.FileSystemLoader(TEMPLATES_DIR),
+    autoescape=True,
+    bytecode_cache=jinja2.FileSystemBytecodeCache(str(template_cache_dir)),
+    auto_reload=DEBUG
+))
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize HTTP client on startup."""
-    app.state.client = httpx.AsyncClient(base_url="http://localhost:8001")
+def setup_http_client(target: FastAPI) -> None:
+    """Open the shared HTTP client when an app starts and close it when it stops."""
+    @target.on_event("startup")
+    async def startup_event():
+        """Initialize HTTP client on startup."""
+        target.state.client = httpx.AsyncClient(base_url="http://localhost:8001")
+    
+    @target.on_event("shutdown")
+    async def shutdown_event():
+        """Close HTTP client on shutdown."""
+        await target.state.client.aclose()
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Close HTTP client on shutdown."""
-    await app.state.client.aclose()
+setup_http_client(app)
 
 @router.get("/", response_class=HTMLResponse)
 async def index(request: Request):
@@ -65,17 +79,11 @@ async def list_repos(request: Request):
 @router.get("/repos/{repo_id}", response_class=HTMLResponse)
 async def view_repo(request: Request, repo_id: str):
     """Render the repository details page."""
-    logger.debug(f"Rendering repository details page for repo_id: {repo_id}")
+    logger.debug("Rendering repository details page for repo_id: %s", repo_id)
     
     try:
-        # Create a client if it doesn't exist
-        client = getattr(request.app.state, "client", None)
-        if not client:
-            logger.debug("Creating HTTP client")
-            client = httpx.AsyncClient()
-            
-        # Fetch repository data from the API
-        response = await client.get(f"/api/repos/{repo_id}")
+        # Fetch repository data from the API with the client shared since startup
+        response = await request.app.state.client.get(f"/api/repos/{repo_id}")
         if response.status_code == 404:
             raise HTTPException(status_code=404, detail="Repository not found")
         elif response.status_code != 200:
@@ -100,7 +108,7 @@ async def view_repo(request: Request, repo_id: str):
 @router.get("/repos/{repo_id}/file", response_class=HTMLResponse)
 async def view_file(request: Request, repo_id: str, path: str = Query(...)):
     """Render the file view page."""
-    logger.debug(f"Rendering file view page for repo_id: {repo_id}, path: {path}")
+    logger.debug("Rendering file view page for repo_id: %s, path: %s", repo_id, path)
     return templates.TemplateResponse(
         "file_view.html",
         {"request": request, "repo_id": repo_id, "file_path": path}
@@ -110,7 +118,7 @@ async def view_file(request: Request, repo_id: str, path: str = Query(...)):
 @router.get("/chat/{repo_id}", response_class=HTMLResponse)
 async def chat_interface(request: Request, repo_id: str):
     """Render the chat interface for a repository."""
-    logger.debug(f"Rendering chat interface for repo_id: {repo_id}")
+    logger.debug("Rendering chat interface for repo_id: %s", repo_id)
     return templates.TemplateResponse(
         "chat.html", 
         {"request": request, "repo_id": repo_id}
@@ -120,7 +128,7 @@ async def chat_interface(request: Request, repo_id: str):
 @router.get("/repos/{repo_id}/chat")
 async def redirect_to_chat(repo_id: str):
     """Redirect to the chat interface."""
-    logger.debug(f"Redirecting to chat interface for repo_id: {repo_id}")
+    logger.debug("Redirecting to chat interface for repo_id: %s", repo_id)
     return RedirectResponse(url=f"/chat/{repo_id}")
 
 
@@ -135,12 +143,5 @@ async def upload_form(request: Request):
 app.include_router(router)
 
 
-# Root endpoint that redirects to the router's root
-@app.get("/")
-async def root():
-    """Redirect to the frontend root."""
-    return RedirectResponse(url="/")
-
-
 if __name__ == "__main__":
     uvicorn.run("app:app", host="127.0.0.1", port=8000, reload=True) 
\ No newline at end of file
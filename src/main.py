@@ -7,9 +7,11 @@ import os
 import sys
 import logging
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 import uvicorn
 
 # Add the parent directory to sys.path to make config importable
@@ -19,7 +21,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 from config import TEMP_DIR, STATIC_DIR, TEMPLATES_DIR, LOG_LEVEL
 
 # Import application components
-from src.frontend.app import app as frontend_app, templates
+from src.frontend.app import router as frontend_router, setup_http_client, templates
 from src.backend.api.app import app as backend_app
 from src.backend.database.mongo_client import MongoDBClient
 
@@ -59,8 +61,10 @@ def create_app() -> FastAPI:
     from src.backend.api.routes import router
     app.include_router(router)
     
-    # Mount frontend app
-    app.mount("/", frontend_app)
+    # Serve the frontend from the same app, so one routing table handles every request
+    app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+    app.include_router(frontend_router)
+    setup_http_client(app)
     
     return app
 
@@ -73,21 +77,25 @@ def main():
     parser.add_argument("--debug", action="store_true", help="Enable debug mode")
     args = parser.parse_args()
     
-    # Create temp directory
-    os.makedirs(TEMP_DIR, exist_ok=True)
-    logger.info(f"Using temporary directory: {TEMP_DIR}")
-    
-    # Verify MongoDB connection
+    # Verify the MongoDB connection in the background while the app is built
     db_client = MongoDBClient()
-    conn_success = db_client.connect()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        connection = executor.submit(db_client.connect)
+        
+        # Create temp directory
+        os.makedirs(TEMP_DIR, exist_ok=True)
+        logger.info(f"Using temporary directory: {TEMP_DIR}")
+        
+        # Initialize the server
+        app = create_app()
+        
+        conn_success = connection.result()
+    
     if conn_success:
         logger.info("Successfully connected to MongoDB")
     else:
         logger.warning("Failed to connect to MongoDB. Some features will be unavailable.")
     
-    # Initialize and start server
-    app = create_app()
-    
     # Configure Uvicorn logging
     log_config = uvicorn.config.LOGGING_CONFIG
     log_config["formatters"]["access"]["fmt"] = "%(asctime)s - %(levelname)s - %(message)s"
@@ -2,10 +2,11 @@
 Pytest configuration file with common fixtures for testing.
 """
 
-import os
+import shutil
 import pytest
 import tempfile
-from unittest.mock import MagicMock, patch
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
 from pymongo.database import Database
 from bson import ObjectId
 
@@ -49,57 +50,35 @@ def mock_llm_client():
     client.generate_text.return_value = "Generated text response"
     
     # Setup generate_text_async method
-    async def async_generate():
-        return "Generated text response async"
-    
-    client.generate_text_async.side_effect = async_generate
+    client.generate_text_async = AsyncMock(return_value="Generated text response async")
     
     # Setup answer_question method
     client.answer_question.return_value = ("Answer to the question", ["file1.py:10-15"])
     
     # Setup analyze_code method
-    async def async_analyze():
-        return "Code analysis result"
-    
-    client.analyze_code.side_effect = async_analyze
+    client.analyze_code = AsyncMock(return_value="Code analysis result")
     
     return client
 
 
-@pytest.fixture
-def temp_repo_dir():
-    """Create a temporary directory for testing repositories."""
-    temp_dir = tempfile.mkdtemp()
-    
-    # Create sample files
-    file1_path = os.path.join(temp_dir, "main.py")
-    with open(file1_path, "w") as f:
-        f.write("""
+# Sample repository files by relative path
+SAMPLE_REPO_FILES = {
+    "main.py": """
 def main():
     print("Hello, World!")
     return True
 
 if __name__ == "__main__":
     main()
-""")
-    
-    file2_path = os.path.join(temp_dir, "utils.py")
-    with open(file2_path, "w") as f:
-        f.write("""
+""",
+    "utils.py": """
 def add(a, b):
     return a + b
 
 def subtract(a, b):
     return a - b
-""")
-    
-    # Create a subdirectory with more files
-    sub_dir = os.path.join(temp_dir, "src")
-    os.makedirs(sub_dir)
-    
-    file3_path = os.path.join(sub_dir, "app.py")
-    with open(file3_path, "w") as f:
-        f.write("""
+""",
+    "src/app.py": """
 from flask import Flask
 
 app = Flask(__name__)
@@ -110,12 +89,24 @@ def home():
 
 if __name__ == "__main__":
     app.run(debug=True)
-""")
+""",
+}
+
+
+@pytest.fixture(scope="session")
+def temp_repo_dir():
+    """Create a temporary directory for testing repositories, once per session."""
+    temp_dir = tempfile.mkdtemp()
+    
+    # Create sample files
+    for relative_path, content in SAMPLE_REPO_FILES.items():
+        file_path = Path(temp_dir, relative_path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(content)
     
     yield temp_dir
     
     # Cleanup
-    import shutil
     shutil.rmtree(temp_dir)
 
 
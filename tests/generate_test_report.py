@@ -10,12 +10,27 @@ import subprocess
 import json
 from datetime import datetime
 
+try:
+    # Streams the report one entry at a time instead of loading it whole
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    # Encodes the saved report in C
+    import orjson
+except ImportError:
+    orjson = None
+
+REPORT_FILE = "tests/report.json"
+REPORT_WRITE_BUFFER_SIZE = 256 * 1024
+
 
 def run_tests():
     """Run pytest and capture the output."""
     # Run pytest with JSON output
     result = subprocess.run(
-        ["python", "-m", "pytest", "tests/", "--json-report", "--json-report-file=tests/report.json"],
+        ["python", "-m", "pytest", "tests/", "--json-report", f"--json-report-file={REPORT_FILE}"],
         capture_output=True,
         text=True
     )
@@ -23,10 +38,32 @@ def run_tests():
     return result.returncode, result.stdout
 
 
+def load_report():
+    """Load the report summary and an iterator over the test entries."""
+    if ijson is None:
+        with open(REPORT_FILE, "r") as f:
+            report_data = json.load(f)
+        return report_data.get("summary", {}), iter(report_data.get("tests", []))
+    
+    with open(REPORT_FILE, "rb") as f:
+        summary = next(ijson.items(f, "summary", use_float=True), {})
+    
+    def iter_tests():
+        with open(REPORT_FILE, "rb") as f:
+            yield from ijson.items(f, "tests.item", use_float=True)
+    
+    return summary, iter_tests()
+
+
+def _test_duration(test_data):
+    """Add up the setup, call and teardown durations of a test entry."""
+    return sum(test_data.get(stage, {}).get("duration", 0) for stage in ("setup", "call", "teardown"))
+
+
 def generate_report(exit_code, output):
     """Generate a test report based on pytest output."""
     # Check if report file exists
-    if not os.path.exists("tests/report.json"):
+    if not os.path.exists(REPORT_FILE):
         return {
             "success": False,
             "message": "Test report not generated. Make sure pytest-json-report is installed.",
@@ -34,12 +71,8 @@ def generate_report(exit_code, output):
             "output": output
         }
     
-    # Load report data
-    with open("tests/report.json", "r") as f:
-        report_data = json.load(f)
-    
-    # Extract summary
-    summary = report_data.get("summary", {})
+    # Load report data, streaming the tests when ijson is installed
+    summary, tests = load_report()
     
     # Generate report
     report = {
@@ -50,18 +83,18 @@ def generate_report(exit_code, output):
         "failed": summary.get("failed", 0),
         "skipped": summary.get("skipped", 0),
         "duration": summary.get("duration", 0),
-        "tests": []
+        # Individual test results
+        "tests": [
+            {
+                "name": test_data.get("nodeid", "unknown"),
+                "outcome": test_data.get("outcome", "unknown"),
+                "duration": _test_duration(test_data),
+                "message": test_data.get("call", {}).get("longrepr", "")
+            }
+            for test_data in tests
+        ]
     }
     
-    # Add individual test results
-    for test_id, test_data in report_data.get("tests", {}).items():
-        report["tests"].append({
-            "name": test_id,
-            "outcome": test_data.get("outcome", "unknown"),
-            "duration": test_data.get("duration", 0),
-            "message": test_data.get("message", "")
-        })
-    
     return report
 
 
@@ -75,9 +108,13 @@ def save_report(report):
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     filename = f"tests/reports/test_report_{timestamp}.json"
     
-    # Save report
-    with open(filename, "w") as f:
-        json.dump(report, f, indent=2)
+    # Save report in one buffered write
+    if orjson is not None:
+        data = orjson.dumps(report, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(report, indent=2).encode("utf-8")
+    with open(filename, "wb", buffering=REPORT_WRITE_BUFFER_SIZE) as f:
+        f.write(data)
     
     return filename
 
@@ -0,0 +1,48 @@
+"""
+Unit tests for the database read caches.
+"""
+
+from src.backend.database import cache
+from src.backend.database.cache import TTLCache
+
+
+class TestTTLCache:
+    """Tests for the TTLCache class."""
+
+    def test_expiry(self, monkeypatch):
+        """Test that entries expire after the TTL."""
+        now = [100.0]
+        monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+        ttl_cache = TTLCache(ttl=30.0)
+        ttl_cache.set("repo", {"status": "analyzed"})
+
+        now[0] = 129.0
+        assert ttl_cache.get("repo") == {"status": "analyzed"}
+        now[0] = 130.0
+        assert ttl_cache.get("repo", "missing") == "missing"
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when full."""
+        ttl_cache = TTLCache(maxsize=2)
+        ttl_cache.set("a", 1)
+        ttl_cache.set("b", 2)
+        ttl_cache.get("a")
+        ttl_cache.set("c", 3)
+
+        assert ttl_cache.get("b") is None
+        assert ttl_cache.get("a") == 1
+        assert ttl_cache.get("c") == 3
+
+    def test_pop_and_clear(self):
+        """Test dropping single entries and every entry."""
+        ttl_cache = TTLCache()
+        ttl_cache.set("a", 1)
+        ttl_cache.set("b", 2)
+
+        ttl_cache.pop("a")
+        ttl_cache.pop("missing")
+        assert ttl_cache.get("a") is None
+        assert ttl_cache.get("b") == 2
+
+        ttl_cache.clear()
+        assert ttl_cache.get("b") is None
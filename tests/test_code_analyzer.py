@@ -2,56 +2,73 @@
 Unit tests for the code analyzer components.
 """
 
+import inspect
+import json
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import MagicMock
 
 from src.backend.code_analyzer.language_detector import LanguageDetector
 from src.backend.code_analyzer.function_extractor import FunctionExtractor
+from src.backend.code_analyzer.parser import CodeParser
 from src.backend.code_analyzer.summarizer import CodeSummarizer
 from src.agents.llm_client import LLMClient
 
 
+# Python snippet shared by the extraction and summarization tests
+PY_SAMPLE = """
+def test_function():
+    \"\"\"This is a test function.\"\"\"
+    print("Hello, World!")
+    return True
+"""
+PY_PARSED = {"lines": PY_SAMPLE.splitlines(), "ast": None}
+
+# Whether extract_functions takes parsed code, resolved once instead of by trial calls
+EXTRACT_ACCEPTS_PARSED = "parsed_code" in inspect.signature(FunctionExtractor.extract_functions).parameters
+
+
+def _constructs(factory):
+    """Check once, at collection, whether a component can be built in this environment."""
+    try:
+        factory()
+        return True
+    except Exception:
+        return False
+
+
+EXTRACTOR_AVAILABLE = _constructs(FunctionExtractor)
+SUMMARIZER_AVAILABLE = _constructs(lambda: CodeSummarizer(llm_client=MagicMock(spec=LLMClient)))
+
+
 class TestLanguageDetector:
     """Tests for the LanguageDetector class."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def language_detector(self):
-        """Create a LanguageDetector instance for testing."""
+        """Create a LanguageDetector instance shared by the module's tests."""
         return LanguageDetector()
     
-    def test_detect_language_by_extension(self, language_detector):
+    @pytest.mark.parametrize("filename,code,expected", [
+        # Capitalized to match implementation
+        ("file.py", "print('Hello')", "Python"),
+        ("file.js", "console.log('Hello');", "JavaScript"),
+        ("file.ts", "const greeting: string = 'Hello';", "TypeScript"),
+        ("file.java", "public class Test { }", "Java"),
+        ("file.cpp", "#include <iostream>", "C++"),
+    ])
+    def test_detect_language_by_extension(self, language_detector, filename, code, expected):
         """Test detecting language by file extension."""
-        # Python - capitalize to match implementation
-        result = language_detector.detect_language("file.py", "print('Hello')")
-        assert result == "Python"
-        
-        # JavaScript - capitalize to match implementation
-        result = language_detector.detect_language("file.js", "console.log('Hello');")
-        assert result == "JavaScript"
-        
-        # TypeScript - capitalize to match implementation
-        result = language_detector.detect_language("file.ts", "const greeting: string = 'Hello';")
-        assert result == "TypeScript"
-        
-        # Java - capitalize to match implementation
-        result = language_detector.detect_language("file.java", "public class Test { }")
-        assert result == "Java"
-        
-        # C++ - capitalize to match implementation
-        result = language_detector.detect_language("file.cpp", "#include <iostream>")
-        assert result == "C++"
+        assert language_detector.detect_language(filename, code) == expected
     
-    def test_detect_language_by_content(self, language_detector):
+    @pytest.mark.parametrize("code", [
+        "def main():\n    print('Hello')\n\nif __name__ == '__main__':\n    main()",
+        "function test() { return true; }\nconst x = 10;",
+        '{"name": "test", "value": 123}',
+    ])
+    def test_detect_language_by_content(self, language_detector, code):
         """Test detecting language by file content when extension is unknown."""
         # Your implementation returns "Unknown" for these cases
-        result = language_detector.detect_language("file.txt", "def main():\n    print('Hello')\n\nif __name__ == '__main__':\n    main()")
-        assert result == "Unknown"
-        
-        result = language_detector.detect_language("file.txt", "function test() { return true; }\nconst x = 10;")
-        assert result == "Unknown"
-        
-        result = language_detector.detect_language("file.txt", '{"name": "test", "value": 123}')
-        assert result == "Unknown"
+        assert language_detector.detect_language("file.txt", code) == "Unknown"
     
     def test_detect_language_unknown(self, language_detector):
         """Test detecting language when both extension and content are unknown."""
@@ -59,96 +76,146 @@ class TestLanguageDetector:
         assert result == "Unknown"  # Changed from "text" to "Unknown"
 
 
-# Skip CodeParser tests for now
-# class TestCodeParser is removed to avoid errors
+class TestCodeParser:
+    """Tests for the CodeParser class."""
+    
+    @pytest.fixture(scope="module")
+    def parser(self):
+        """Create a CodeParser instance shared by the module's tests."""
+        return CodeParser()
+    
+    def test_parse_file_content(self, parser):
+        """Test parsing content given as a string, which is kept with the result."""
+        result = parser.parse_file("sample.py", PY_SAMPLE)
+        
+        assert result["language"] == "Python"
+        assert result["content"] == PY_SAMPLE
+        assert [f["name"] for f in result["functions"]] == ["test_function"]
+        assert "error" not in result
+    
+    def test_parse_file_loader(self, parser):
+        """Test parsing content read through a loader, which is kept instead of the content."""
+        loader = lambda: PY_SAMPLE.encode('utf-8')
+        
+        result = parser.parse_file("sample.py", loader)
+        
+        assert "content" not in result
+        assert result["preview"] == PY_SAMPLE
+        assert result["_loader"] is loader
+        assert result["size_bytes"] == len(PY_SAMPLE)
+    
+    def test_parse_file_unreadable(self, parser, tmp_path):
+        """Test that a file that cannot be read gives an error record instead of raising."""
+        def load():
+            with open(tmp_path / "deleted.py", 'rb') as f:
+                return f.read()
+        
+        result = parser.parse_file("deleted.py", load)
+        
+        assert result["language"] == "Unknown"
+        assert result["functions"] == []
+        assert "error" in result
 
 
+@pytest.mark.skipif(not EXTRACTOR_AVAILABLE, reason="FunctionExtractor unavailable")
 class TestFunctionExtractor:
     """Tests for the FunctionExtractor class."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def function_extractor(self):
-        """Create a FunctionExtractor instance for testing."""
-        # Skip tests completely if initializing causes issues
-        try:
-            extractor = FunctionExtractor()
-            return extractor
-        except Exception as e:
-            pytest.skip(f"Failed to create FunctionExtractor: {str(e)}")
+        """Create a FunctionExtractor instance shared by the module's tests."""
+        return FunctionExtractor()
     
     def test_extract_python_functions(self, function_extractor):
         """Test extracting functions from Python code."""
-        code = """
-def test_function():
-    \"\"\"This is a test function.\"\"\"
-    print("Hello, World!")
-    return True
-"""
         language = "Python"  # Capitalize to match implementation
         
-        # Try to extract functions with minimum requirements
-        try:
-            # Try with just code and language
-            result = function_extractor.extract_functions(code, language)
-            assert isinstance(result, list)
-        except TypeError:
-            # If that fails, try with a parsed_code parameter
-            parsed_code = {"lines": code.splitlines(), "ast": None}
-            result = function_extractor.extract_functions(code, language, parsed_code)
-            assert isinstance(result, list)
-        except Exception as e:
-            pytest.skip(f"Failed to extract Python functions: {str(e)}")
+        if EXTRACT_ACCEPTS_PARSED:
+            result = function_extractor.extract_functions(PY_SAMPLE, language, PY_PARSED)
+        else:
+            result = function_extractor.extract_functions(PY_SAMPLE, language, "sample.py")
+        assert isinstance(result, list)
     
+    def test_extracted_function_code(self, function_extractor):
+        """Test that extracted functions are plain dicts with their code."""
+        code = "class Greeter:\n    def greet(self, name):\n        return name\n"
+
+        result = function_extractor.extract_functions(code, "Python", "greeter.py")
+
+        method = next(f for f in result if f["name"] == "Greeter.greet")
+        assert method.get("code") == "    def greet(self, name):\n        return name"
+        assert json.loads(json.dumps(result)) == result
+        assert isinstance(method, dict)
+
+    @pytest.mark.parametrize("newline", ["\n", "\r\n", "\r"], ids=["lf", "crlf", "cr"])
+    def test_extract_python_functions_newlines(self, function_extractor, newline):
+        """Test that functions are sliced cleanly whatever the line endings."""
+        code = newline.join(["def f():", "    return 1", "", "def g():", "    return 2", ""])
+
+        result = function_extractor.extract_functions(code, "Python", "newlines.py")
+
+        assert [(f["name"], f["code"]) for f in result] == [
+            ("f", "def f():\n    return 1"),
+            ("g", "def g():\n    return 2"),
+        ]
+
+    def test_methods_attributed_to_enclosing_class(self, function_extractor):
+        """Test that methods are named after the class they are declared in."""
+        code = "class Dog\n  def bark\n  end\nend\n\nclass Cat\n  def meow\n  end\nend\n"
+
+        result = function_extractor.extract_functions(code, "Ruby", "pets.rb")
+
+        assert [f["name"] for f in result] == ["Dog.bark", "Cat.meow"]
+
     def test_extract_javascript_functions(self, function_extractor):
         """Test extracting functions from JavaScript code."""
-        pytest.skip("Skipping JavaScript function extraction test")
+        code = (
+            "function greet(name) {\n  return name;\n}\n\n"
+            "class Dog {\n  bark() {\n    return 1;\n  }\n}\n\n"
+            "const add = (a, b) => {\n  return a + b;\n}\n"
+        )
+        
+        result = function_extractor.extract_functions(code, "JavaScript", "sample.js")
+        
+        functions = {f["name"]: f for f in result}
+        assert {"greet", "Dog.bark", "add"} <= functions.keys()
+        assert (functions["Dog.bark"]["start_line"], functions["Dog.bark"]["end_line"]) == (6, 8)
+        assert functions["add"]["code"].endswith("return a + b;\n}")
 
 
+@pytest.mark.skipif(not SUMMARIZER_AVAILABLE, reason="CodeSummarizer unavailable")
 class TestCodeSummarizer:
     """Tests for the CodeSummarizer class."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def summarizer(self):
-        """Create a CodeSummarizer instance for testing."""
-        try:
-            llm_client = MagicMock(spec=LLMClient)
-            return CodeSummarizer(llm_client=llm_client)
-        except Exception as e:
-            pytest.skip(f"Failed to create CodeSummarizer: {str(e)}")
+        """Create a CodeSummarizer instance shared by the module's tests."""
+        llm_client = MagicMock(spec=LLMClient)
+        return CodeSummarizer(llm_client=llm_client)
     
-    @pytest.mark.asyncio
-    async def test_summarize(self, summarizer):
-        """Test summarizing code."""
-        try:
-            code = """
-def test_function():
-    \"\"\"This is a test function.\"\"\"
-    print("Hello, World!")
-    return True
-"""
-            language = "Python"  # Capitalize to match implementation
-            functions = []  # Pass empty list if needed
-            
-            # Try different possible method names
-            if hasattr(summarizer, 'summarize'):
-                async def mock_analyze(*args, **kwargs):
-                    return "This file contains a test function."
-                    
-                summarizer.llm_client.analyze_code = mock_analyze
-                
-                result = await summarizer.summarize(code, language, functions)
-                assert isinstance(result, str)
-            else:
-                pytest.skip("No suitable summarization method found")
-        except Exception as e:
-            pytest.skip(f"Failed to test summarize: {str(e)}")
-    
-    @pytest.mark.asyncio
-    async def test_summarize_with_empty_code(self, summarizer):
-        """Test summarizing empty code."""
-        pytest.skip("Skipping empty code summarization test")
+    @pytest.mark.parametrize("code", [
+        PY_SAMPLE,
+        "",
+        "x = 1\n",
+    ], ids=["function", "empty", "small"])
+    def test_summarize_file(self, summarizer, monkeypatch, code):
+        """Test summarizing code of different sizes."""
+        # Undone after the test, since the summarizer is shared
+        generate_text = MagicMock(return_value="  This file contains a test function.\n")
+        monkeypatch.setattr(summarizer.llm_client, "generate_text", generate_text)
+        
+        result = summarizer.summarize_file("test.py", code, "Python", [])
+        
+        assert result == "This file contains a test function."
+        generate_text.assert_called_once()
     
-    @pytest.mark.asyncio
-    async def test_summarize_with_small_code(self, summarizer):
-        """Test summarizing small code snippets."""
-        pytest.skip("Skipping small code summarization test")
+    def test_summarize_file_cached(self):
+        """Test that a stored summary is returned without calling the LLM."""
+        db_client = MagicMock()
+        db_client.db.file_summaries.find_one.return_value = {"summary": "Cached summary."}
+        summarizer = CodeSummarizer(db_client=db_client, llm_client=MagicMock(spec=LLMClient))
+        
+        result = summarizer.summarize_file("test.py", PY_SAMPLE, "Python", [])
+        
+        assert result == "Cached summary."
+        summarizer.llm_client.generate_text.assert_not_called()
@@ -0,0 +1,138 @@
+"""
+Unit tests for the DBClient writes.
+"""
+
+import pytest
+from unittest.mock import patch, MagicMock
+from pymongo.errors import BulkWriteError
+
+from src.backend.database.cache import repository_cache
+from src.backend.database.db_client import DBClient, WriteBatch, DUPLICATE_KEY_ERROR
+
+
+@pytest.fixture
+def db_client():
+    """Create a DBClient backed by a mock MongoDB client."""
+    with patch('src.backend.database.db_client.get_mongo_client'):
+        return DBClient(uri="mongodb://test", db_name="test")
+
+
+def _processed_file(path):
+    """Build a processed file as the analyzer hands it to the write buffer."""
+    return {"path": path, "language": "Python", "content": "x = 1\n",
+            "functions": [], "documentation": []}
+
+
+class TestWriteBatch:
+    """Tests for the WriteBatch class."""
+
+    def test_flushes_when_full_and_on_exit(self):
+        """Test that files are saved once the batch is full and when it exits."""
+        db_client = MagicMock()
+        db_client.save_files.return_value = True
+
+        with WriteBatch(db_client, "repo", first_ingest=True, flush_size=2) as writes:
+            writes.add_files([_processed_file("a.py"), _processed_file("b.py")])
+            assert db_client.save_files.call_count == 1
+            writes.add_files([_processed_file("c.py")])
+
+        assert [len(call.args[1]) for call in db_client.save_files.call_args_list] == [2, 1]
+        assert all(call.kwargs["first_ingest"] for call in db_client.save_files.call_args_list)
+
+    def test_failed_flush_raises_on_exit(self):
+        """Test that a failed save is raised rather than dropped."""
+        db_client = MagicMock()
+        db_client.save_files.side_effect = [False, True]
+
+        with pytest.raises(RuntimeError, match="Failed to save 2 files"):
+            with WriteBatch(db_client, "repo", flush_size=2) as writes:
+                writes.add_files([_processed_file("a.py"), _processed_file("b.py")])
+                writes.add_files([_processed_file("c.py")])
+
+    def test_exception_in_block_is_kept(self):
+        """Test that an exception raised inside the batch is not replaced."""
+        db_client = MagicMock()
+        db_client.save_files.return_value = False
+
+        with pytest.raises(KeyError):
+            with WriteBatch(db_client, "repo") as writes:
+                writes.add_files([_processed_file("a.py")])
+                raise KeyError("path")
+
+
+class TestBulkWrites:
+    """Tests for DBClient.save_files and its bulk writes."""
+
+    @pytest.mark.parametrize("first_ingest,method", [
+        (True, "bulk_insert"),
+        (False, "bulk_upsert"),
+    ])
+    def test_save_files(self, db_client, first_ingest, method):
+        """Test that new repositories are inserted and existing ones upserted."""
+        with patch.object(db_client, method, return_value=True) as write:
+            assert db_client.save_files("repo", [_processed_file("src/Main.py")], first_ingest=first_ingest)
+
+        collection, docs = write.call_args.args
+        assert collection == "files"
+        assert docs[0]["path"] == "src/Main.py"
+        assert docs[0]["name_lc"] == "main.py"
+        assert write.call_args.kwargs["keys"] == ("repo_id", "path")
+
+    def test_bulk_insert_upserts_duplicates(self, db_client):
+        """Test that documents that already exist are upserted instead."""
+        docs = [{"_id": 1, "path": "a.py"}, {"_id": 2, "path": "b.py"}]
+        db_client.db["files"].insert_many.side_effect = BulkWriteError({
+            "writeErrors": [{"index": 1, "code": DUPLICATE_KEY_ERROR}]
+        })
+
+        with patch.object(db_client, "bulk_upsert", return_value=True) as upsert:
+            assert db_client.bulk_insert("files", docs, keys=("path",))
+
+        assert upsert.call_args.args == ("files", [{"path": "b.py"}])
+
+    def test_bulk_insert_other_error_fails(self, db_client):
+        """Test that write errors other than duplicates are reported as failures."""
+        db_client.db["files"].insert_many.side_effect = BulkWriteError({
+            "writeErrors": [{"index": 0, "code": 121}]
+        })
+
+        with patch.object(db_client, "bulk_upsert") as upsert:
+            assert db_client.bulk_insert("files", [{"path": "a.py"}], keys=("path",)) is False
+
+        upsert.assert_not_called()
+
+
+class TestRepositoryUpdates:
+    """Tests for DBClient repository updates."""
+
+    def test_update_status_ignores_cached_status(self, db_client):
+        """Test that a cached status never stops the write; the server decides."""
+        repository_cache.set((db_client.uri, db_client.db_name, "repo"), {"_id": "repo", "status": "analyzed"})
+
+        assert db_client.update_repository_status("repo", "analyzed")
+
+        db_client.db.repositories.update_one.assert_called_once_with(
+            {"_id": "repo", "status": {"$ne": "analyzed"}},
+            {"$set": {"status": "analyzed"}}
+        )
+        assert repository_cache.get((db_client.uri, db_client.db_name, "repo")) is None
+
+    def test_update_repository_skips_matching_documents(self, db_client):
+        """Test that documents already holding every value are left unmatched."""
+        assert db_client.update_repository("repo", summary="s", status="analyzed")
+
+        query, update = db_client.db.repositories.update_one.call_args.args
+        assert query == {"_id": "repo", "$or": [{"summary": {"$ne": "s"}}, {"status": {"$ne": "analyzed"}}]}
+        assert update == {"$set": {"summary": "s", "status": "analyzed"}}
+
+    def test_delete_repository_evicts_cache(self, db_client):
+        """Test that a deleted repository is no longer served from the cache."""
+        db_client.db.repositories.find_one.return_value = {"_id": "repo", "name": "repo", "type": "github"}
+        assert db_client.get_repository("repo") is not None
+        db_client.db.repositories.delete_one.return_value.deleted_count = 1
+        db_client.db.repositories.find_one.return_value = None
+
+        assert db_client.delete_repository("repo")
+
+        assert db_client.get_repository("repo") is None
+        db_client.db.files.delete_many.assert_called_once_with({"repo_id": {"$in": ["repo"]}})
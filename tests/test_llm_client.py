@@ -3,7 +3,6 @@ Unit tests for the LLMClient class.
 """
 
 import pytest
-from unittest.mock import patch, MagicMock
 
 from src.agents.llm_client import LLMClient
 
@@ -11,54 +10,25 @@ from src.agents.llm_client import LLMClient
 class TestLLMClient:
     """Tests for the LLMClient class."""
     
-    @pytest.fixture
-    def llm_client(self):
-        """Create an LLMClient instance for testing."""
-        return LLMClient(
-            api_key="test_key",
-            api_url="https://api.openai.com/v1/completions",
-            model="gpt-3.5-turbo"
-        )
-    
-    def test_init_openai(self):
-        """Test LLMClient initialization with OpenAI settings."""
-        client = LLMClient(
-            api_key="test_key",
-            api_url="https://api.openai.com/v1/completions",
-            model="gpt-3.5-turbo"
-        )
-        assert client.api_key == "test_key"
-        assert client.api_url == "https://api.openai.com/v1/completions"
-        assert client.model == "gpt-3.5-turbo"
-        assert client.provider == "openai"
-    
-    def test_init_anthropic(self):
-        """Test LLMClient initialization with Anthropic settings."""
-        client = LLMClient(
-            api_key="test_key",
-            api_url="https://api.anthropic.com/v1/complete",
-            model="claude-2"
-        )
-        assert client.api_key == "test_key"
-        assert client.api_url == "https://api.anthropic.com/v1/complete"
-        assert client.model == "claude-2"
-        assert client.provider == "anthropic"
-    
-    def test_init_custom(self):
-        """Test LLMClient initialization with custom settings."""
+    @pytest.mark.parametrize("api_url,model,provider", [
+        ("https://api.openai.com/v1/completions", "gpt-3.5-turbo", "openai"),
+        ("https://api.anthropic.com/v1/complete", "claude-2", "anthropic"),
+        ("https://custom-llm-api.com/generate", "custom-model", "custom"),
+    ], ids=["openai", "anthropic", "custom"])
+    def test_init(self, api_url, model, provider):
+        """Test LLMClient initialization and provider detection."""
         client = LLMClient(
             api_key="test_key",
-            api_url="https://custom-llm-api.com/generate",
-            model="custom-model"
+            api_url=api_url,
+            model=model
         )
         assert client.api_key == "test_key"
-        assert client.api_url == "https://custom-llm-api.com/generate"
-        assert client.model == "custom-model"
-        assert client.provider == "custom"
+        assert client.api_url == api_url
+        assert client.model == model
+        assert client.provider == provider
     
     # Skip async tests as they require more complex mocking
     @pytest.mark.skip("Skipping async test for simplicity")
-    @pytest.mark.asyncio
     async def test_analyze_code(self):
         """Test analyzing code."""
         pass
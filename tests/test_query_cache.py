@@ -0,0 +1,98 @@
+"""
+Unit tests for the QueryResponseCache class.
+"""
+
+import pytest
+from unittest.mock import patch, MagicMock
+
+from src.backend.llm import query_cache
+from src.backend.llm.query_cache import QueryResponseCache
+from src.backend.llm.query_processor import QueryProcessor
+
+
+@pytest.fixture(scope="module")
+def processor():
+    """Create a QueryProcessor for its keyword signatures, without an LLM client."""
+    with patch('src.backend.llm.query_processor.LLMClient'):
+        return QueryProcessor(db_client=MagicMock())
+
+
+class TestQueryResponseCache:
+    """Tests for the QueryResponseCache class."""
+
+    @pytest.mark.parametrize("cached,asked", [
+        ("How are errors handled in the parser?", "How are errors handled in the parser?"),
+        ("How are errors handled in the parser?", "how are the errors handled in parser"),
+    ])
+    def test_rephrased_query_hits(self, processor, cached, asked):
+        """Test that a rephrasing of a cached question reuses its answer."""
+        cache = QueryResponseCache()
+        cache.set("repo", processor._keyword_signature(cached), {"text": "answer"},
+                  processor._identifier_signature(cached))
+
+        assert cache.get("repo", processor._keyword_signature(asked),
+                         processor._identifier_signature(asked)) == {"text": "answer"}
+
+    @pytest.mark.parametrize("cached,asked", [
+        ("How are errors handled in the parser?", "How are errors not handled in the parser?"),
+        ("Which files import pandas and numpy?", "Which files import pandas but not numpy?"),
+        ("Which files import pandas and numpy?", "Which files import pandas without numpy?"),
+        ("Does the loader retry requests?", "Doesn't the loader retry requests?"),
+        ("How are errors handled in the parser?", "How are errors handled in the parser module?"),
+        ("Does parse_file call extract_documentation?", "Does extract_documentation call parse_file?"),
+        ("Does the parser call the summarizer?", "Does the summarizer call the parser?"),
+    ])
+    def test_different_query_misses(self, processor, cached, asked):
+        """Test that negated, contrasted, reversed or extended questions do not reuse an answer."""
+        cache = QueryResponseCache()
+        cache.set("repo", processor._keyword_signature(cached), {"text": "answer"},
+                  processor._identifier_signature(cached))
+
+        assert cache.get("repo", processor._keyword_signature(asked),
+                         processor._identifier_signature(asked)) is None
+
+    def test_returns_copy(self):
+        """Test that callers cannot change a cached response."""
+        cache = QueryResponseCache()
+        cache.set("repo", ("errors",), {"referenced_files": []})
+
+        cache.get("repo", ("errors",))["referenced_files"].append("main.py")
+
+        assert cache.get("repo", ("errors",)) == {"referenced_files": []}
+
+    def test_expiry(self, monkeypatch):
+        """Test that responses expire after the TTL."""
+        now = [100.0]
+        monkeypatch.setattr(query_cache.time, "monotonic", lambda: now[0])
+        cache = QueryResponseCache(ttl=10.0)
+        cache.set("repo", ("errors",), {"text": "answer"})
+
+        now[0] = 109.0
+        assert cache.get("repo", ("errors",)) is not None
+        now[0] = 110.0
+        assert cache.get("repo", ("errors",)) is None
+
+    def test_per_repo_cap(self):
+        """Test that each repository keeps only its most recently used responses."""
+        cache = QueryResponseCache(max_entries_per_repo=2)
+        cache.set("repo", ("first",), {"text": "1"})
+        cache.set("repo", ("second",), {"text": "2"})
+        cache.set("other", ("first",), {"text": "other"})
+        cache.get("repo", ("first",))
+        cache.set("repo", ("third",), {"text": "3"})
+
+        assert cache.get("repo", ("second",)) is None
+        assert cache.get("repo", ("first",)) == {"text": "1"}
+        assert cache.get("repo", ("third",)) == {"text": "3"}
+        assert cache.get("other", ("first",)) == {"text": "other"}
+
+    def test_invalidate(self):
+        """Test that invalidating a repository drops only its responses."""
+        cache = QueryResponseCache()
+        cache.set("repo", ("errors",), {"text": "answer"})
+        cache.set("other", ("errors",), {"text": "answer"})
+
+        cache.invalidate("repo")
+
+        assert cache.get("repo", ("errors",)) is None
+        assert cache.get("other", ("errors",)) is not None
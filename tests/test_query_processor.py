@@ -9,6 +9,13 @@ from unittest.mock import patch, MagicMock
 from src.backend.llm.query_processor import QueryProcessor
 
 
+@pytest.fixture(scope="module", autouse=True)
+def patch_llm_client():
+    """Patch the LLMClient once for the whole module to avoid API calls."""
+    with patch('src.backend.llm.query_processor.LLMClient'):
+        yield
+
+
 # For now, just test initialization to ensure the class can be imported
 class TestQueryProcessor:
     """Tests for the QueryProcessor class."""
@@ -18,17 +25,13 @@ class TestQueryProcessor:
         # Create mocks
         db_client = MagicMock()
         
-        # Patch the LLMClient to avoid API calls
-        with patch('src.backend.llm.query_processor.LLMClient') as MockLLMClient:
-            MockLLMClient.return_value = MagicMock()
-            
-            # Create QueryProcessor instance
-            processor = QueryProcessor(db_client=db_client)
-            
-            # Verify the instance is properly initialized
-            assert processor.db_client is db_client
-            assert processor.logger is not None
-            assert processor.llm_client is not None
+        # Create QueryProcessor instance
+        processor = QueryProcessor(db_client=db_client)
+        
+        # Verify the instance is properly initialized
+        assert processor.db_client is db_client
+        assert processor.logger is not None
+        assert processor.llm_client is not None
     
     # Skip more complex tests for now
     @pytest.mark.skip("Skipping complex test")
@@ -38,7 +41,6 @@ class TestQueryProcessor:
     
     # Skip async tests as they require more complex mocking
     @pytest.mark.skip("Skipping async test")
-    @pytest.mark.asyncio
     async def test_process_query(self):
         """Test processing a query."""
         pass 
\ No newline at end of file
@@ -5,7 +5,18 @@ Unit tests for the RepoAnalyzer class.
 import pytest
 from unittest.mock import patch, MagicMock
 
+from src.backend.analyzer import repo_analyzer
 from src.backend.analyzer.repo_analyzer import RepoAnalyzer
+from src.backend.database.db_client import WriteBatch
+
+
+@pytest.fixture(scope="module", autouse=True)
+def patch_dependencies():
+    """Patch the analyzer's dependencies once for the whole module."""
+    with patch('src.backend.analyzer.repo_analyzer.CodeParser'), \
+         patch('src.backend.analyzer.repo_analyzer.CodeSummarizer'), \
+         patch('src.backend.analyzer.repo_analyzer.LLMClient'):
+        yield
 
 
 # For now, just test initialization to ensure the class can be imported
@@ -17,24 +28,49 @@ class TestRepoAnalyzer:
         # Create mock db_client
         db_client = MagicMock()
         
-        # Create the analyzer with minimal dependencies
-        try:
-            # Patch the dependencies to avoid import errors
-            with patch('src.backend.analyzer.repo_analyzer.CodeParser'), \
-                 patch('src.backend.analyzer.repo_analyzer.CodeSummarizer'), \
-                 patch('src.backend.analyzer.repo_analyzer.LLMClient'):
-                
-                analyzer = RepoAnalyzer(db_client=db_client)
-                
-                # Verify basic attributes
-                assert analyzer.db_client is db_client
-                assert analyzer.logger is not None
-        except Exception as e:
-            pytest.skip(f"Failed to initialize RepoAnalyzer: {str(e)}")
+        analyzer = RepoAnalyzer(db_client=db_client)
+        
+        # Verify basic attributes
+        assert analyzer.db_client is db_client
+        assert analyzer.logger is not None
+        # File summaries are cached in the same database
+        assert repo_analyzer.CodeSummarizer.call_args.kwargs["db_client"] is db_client
     
     # Skip more complex tests for now
     @pytest.mark.skip("Skipping complex async test")
-    @pytest.mark.asyncio
     async def test_analyze_repository(self):
         """Test analyzing a repository."""
-        pass 
\ No newline at end of file
+        pass     
+    def test_file_record_drops_text(self, tmp_path):
+        """Test that kept file records hold metadata only, and reload content on demand."""
+        (tmp_path / "main.py").write_bytes(b"def main():\n    pass\n")
+        file_data = {
+            "path": "main.py",
+            "language": "Python",
+            "content": "def main():\n    pass\n",
+            "functions": [{"name": "main", "signature": "def main()", "description": "",
+                           "start_line": 1, "end_line": 2, "code": "def main():\n    pass"}],
+            "documentation": [{"type": "single", "text": "comment", "line": 1}]
+        }
+        
+        record = RepoAnalyzer._file_record(file_data, str(tmp_path))
+        
+        assert "content" not in record and "documentation" not in record
+        assert record["functions"] == [{"name": "main", "start_line": 1, "end_line": 2}]
+        assert record["_loader"]() == b"def main():\n    pass\n"
+    
+    def test_failed_file_writes_mark_error(self, tmp_path):
+        """Test that a repository whose files could not be saved is not marked analyzed."""
+        (tmp_path / "main.py").write_text("x = 1\n")
+        db_client = MagicMock()
+        db_client.get_repository.return_value.get_local_path.return_value = str(tmp_path)
+        db_client.save_files.return_value = False
+        db_client.batch.side_effect = lambda repo_id, first_ingest: WriteBatch(db_client, repo_id)
+        analyzer = RepoAnalyzer(db_client=db_client)
+        analyzer.parser.function_extractor.extract_functions.return_value = []
+        
+        result = analyzer.analyze_repository("repo")
+        
+        assert "error" in result
+        db_client.update_repository_status.assert_called_with("repo", "error")
+        db_client.update_repository.assert_not_called()
@@ -2,21 +2,27 @@
 Unit tests for the RepoLoader class.
 """
 
+import zipfile
+
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import MagicMock
 from bson import ObjectId
 
 # Import just the base class to avoid circular imports
 from src.backend.repo_manager.repo_loader import RepoLoader
 from src.backend.repo_manager.repo_loader_factory import RepoLoaderFactory
+from src.backend.repo_manager import github_loader
+from src.backend.repo_manager.zip_loader import ZipLoader
+from src.backend.repo_manager.local_loader import LocalLoader
+from src.backend.database.cache import TTLCache
 
 
 class TestRepoLoader:
     """Tests for the RepoLoader class."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def repo_loader(self):
-        """Create a RepoLoader instance for testing."""
+        """Create a RepoLoader instance shared by the module's tests."""
         db_client = MagicMock()
         return RepoLoader(db_client=db_client)
     
@@ -29,13 +35,24 @@ class TestRepoLoader:
 class TestRepoLoaderFactory:
     """Tests for the RepoLoaderFactory class."""
     
+    @pytest.fixture(autouse=True)
+    def restore_registry(self):
+        """Undo registrations made by a test, so tests can run in any order or process."""
+        loaders = dict(RepoLoaderFactory._loaders)
+        instances = dict(RepoLoaderFactory._instances)
+        yield
+        RepoLoaderFactory._loaders.clear()
+        RepoLoaderFactory._loaders.update(loaders)
+        RepoLoaderFactory._instances.clear()
+        RepoLoaderFactory._instances.update(instances)
+    
     def test_register_and_get_loader(self):
         """Test registering and retrieving a loader."""
         # Create a mock loader class
         MockLoader = MagicMock()
         
-        # Register the loader
-        RepoLoaderFactory.register("test", MockLoader)
+        # Register the loader the way loader modules do, as a class decorator
+        RepoLoaderFactory.register("test")(MockLoader)
         
         # Get the loader
         loader = RepoLoaderFactory.get_loader("test")
@@ -46,4 +63,80 @@ class TestRepoLoaderFactory:
     def test_get_loader_invalid_type(self):
         """Test getting a loader for an invalid type."""
         with pytest.raises(ValueError):
-            RepoLoaderFactory.get_loader("invalid_type") 
\ No newline at end of file
+            RepoLoaderFactory.get_loader("invalid_type") 
+
+class TestGitHubLoader:
+    """Tests for GitHub URL validation."""
+    
+    @pytest.mark.parametrize("status_code,valid,cached", [
+        (200, True, True),
+        (404, False, True),
+        (429, False, False),
+        (503, False, False),
+    ])
+    def test_validate_caches_definite_answers(self, monkeypatch, status_code, valid, cached):
+        """Test that only found and not-found answers are cached, so transient errors are retried."""
+        monkeypatch.setattr(github_loader, "_validated_urls", TTLCache())
+        head = MagicMock(return_value=MagicMock(status_code=status_code))
+        monkeypatch.setattr(github_loader._SESSION, "head", head)
+        loader = github_loader.GitHubLoader()
+        
+        assert loader.validate("https://github.com/owner/repo") is valid
+        assert loader.validate("https://github.com/owner/repo") is valid
+        
+        assert head.call_count == (1 if cached else 2)
+
+
+def _extract_zip(tmp_path, names):
+    """Extract an archive of the given member names and list the files written."""
+    archive = tmp_path / "repo.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        for name in names:
+            zf.writestr(name, "x = 1\n")
+    target = tmp_path / "target"
+    target.mkdir()
+    
+    with zipfile.ZipFile(archive) as zf:
+        ZipLoader()._extract_members(zf, str(target))
+    
+    return sorted(path.relative_to(target).as_posix() for path in target.rglob("*") if path.is_file())
+
+
+class TestZipLoader:
+    """Tests for ZIP extraction."""
+    
+    @pytest.mark.parametrize("names,expected", [
+        (["repo-main/a.py", "repo-main/pkg/b.py"], ["a.py", "pkg/b.py"]),
+        (["src/app/a.py", "src/app/b.py"], ["app/a.py", "app/b.py"]),
+        (["src/a.py", "tests/b.py"], ["src/a.py", "tests/b.py"]),
+        (["README.md", "src/a.py"], ["README.md", "src/a.py"]),
+    ], ids=["top-level", "nested", "several", "root-file"])
+    def test_strips_single_top_level_directory(self, tmp_path, names, expected):
+        """Test that only one shared top-level directory is stripped."""
+        assert _extract_zip(tmp_path, names) == expected
+    
+    def test_skips_members_outside_target(self, tmp_path):
+        """Test that members escaping the target directory are never written."""
+        files = _extract_zip(tmp_path, ["repo/a.py", "repo/../../evil.py", "../evil.py"])
+        
+        assert files == ["repo/a.py"]
+        assert not (tmp_path / "evil.py").exists()
+        assert not (tmp_path.parent / "evil.py").exists()
+
+
+class TestLocalLoader:
+    """Tests for local repository validation."""
+    
+    def test_size_limit_ignores_skipped_directories(self, tmp_path):
+        """Test that history and dependency folders do not count towards the size limit."""
+        (tmp_path / "main.py").write_bytes(b"x" * 10)
+        for skipped in (".git", "node_modules"):
+            (tmp_path / skipped).mkdir()
+            (tmp_path / skipped / "blob").write_bytes(b"x" * 100)
+        loader = LocalLoader()
+        loader.max_size_bytes = 50
+        
+        assert loader.validate(str(tmp_path))
+        
+        (tmp_path / "data.py").write_bytes(b"x" * 100)
+        assert not loader.validate(str(tmp_path))